@@ -0,0 +1,41 @@
+"""名单的保存、读取和去重"""
+from data_management import DataManager, SqliteBackend
+from journal import Journal
+
+
+def data_manager(tmp_path):
+    return DataManager(SqliteBackend(str(tmp_path / 'data.db')), Journal(str(tmp_path / 'journal.log')))
+
+
+def bench_save_data(benchmark, roster, tmp_path):
+    manager = data_manager(tmp_path)
+    benchmark(manager.save_data, roster)
+
+
+def bench_load_data(benchmark, roster, tmp_path):
+    manager = data_manager(tmp_path)
+    manager.save_data(roster)
+    store = benchmark(manager.load_data)
+    assert len(store) == len(roster)
+
+
+def bench_add_duplicate(benchmark, store):
+    """add_entry 的去重：1000 个已存在的姓名全部被拒绝"""
+    names = [store.get(entry_id) for entry_id in range(1, len(store) + 1, max(len(store) // 1000, 1))]
+
+    def add_all():
+        return sum(store.add(name) is None for name in names)
+
+    assert benchmark(add_all) == len(names)
+
+
+def bench_add_remove(benchmark, store):
+    """add_entry 加 delete_entry：1000 个新姓名加入后再删除"""
+    names = [f"新员工{i}" for i in range(1000)]
+
+    def add_remove():
+        ids = [store.add(name) for name in names]
+        for entry_id in ids:
+            store.remove(entry_id)
+
+    benchmark(add_remove)
@@ -0,0 +1,33 @@
+"""抽奖：pause_rolling 的抽取并移出，以及带日志的抽奖段"""
+import random
+from draw_engine import DrawEngine, LazyShuffle
+from draw_session import DrawSession
+
+ROUNDS = 500
+
+
+def bench_build_engine(benchmark, roster):
+    benchmark(lambda: DrawEngine(roster, rng=random.Random(0)))
+
+
+def bench_draw_and_remove(benchmark, roster):
+    engine = DrawEngine(roster, rng=random.Random(0))
+    benchmark.pedantic(engine.draw, rounds=min(ROUNDS, len(roster) // 2), iterations=1)
+
+
+def bench_weighted_draw(benchmark, roster):
+    engine = DrawEngine(roster, rng=random.Random(0), weights=roster.weights)
+    benchmark.pedantic(engine.draw, rounds=min(ROUNDS, len(roster) // 2), iterations=1)
+
+
+def bench_session_draw(benchmark, roster, tmp_path):
+    """每抽一人写一行抽奖日志"""
+    session = DrawSession(roster, 'bench', str(tmp_path))
+    benchmark.pedantic(session.draw, rounds=min(ROUNDS, len(roster) // 2), iterations=1)
+    session.close()
+
+
+def bench_shuffle_next(benchmark, roster):
+    """滚动显示每一帧取下一个名字"""
+    shuffle = LazyShuffle(DrawEngine(roster), rng=random.Random(0))
+    benchmark(shuffle.next)
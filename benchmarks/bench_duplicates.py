@@ -0,0 +1,8 @@
+"""导入时检查疑似重复：规范化分组和 MinHash 分桶"""
+from duplicates import find_suspects
+
+
+def bench_find_suspects(benchmark, roster):
+    """合成名单的姓名都超过四个字，全部进入 MinHash 分桶；数字不同的姓名不算相似，应当没有疑似重复"""
+    suspects = benchmark.pedantic(find_suspects, args=(list(roster.snapshot()),), rounds=3, iterations=1)
+    assert suspects == []
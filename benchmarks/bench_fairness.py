@@ -0,0 +1,15 @@
+"""公平性模拟：一批整场抽奖的向量化模拟（单进程）"""
+import numpy as np
+from fairness import BATCH_RUNS, pick_sequence, simulate_chunk
+
+PRIZES = [{'name': '一等奖', 'count': 3}, {'name': '二等奖', 'count': 10}, {'name': '三等奖', 'count': 100}]
+
+
+def bench_simulate_batch(benchmark, roster):
+    """合成名单中每 10 人有一人权重为 2，走按权重的指数竞赛"""
+    weights = np.array([row[2] for row in roster.rows()], dtype=np.float64)
+    sequence = pick_sequence(PRIZES)
+    seed = np.random.SeedSequence(0)
+    counts = benchmark.pedantic(simulate_chunk, args=(weights, sequence, len(PRIZES), BATCH_RUNS, seed),
+                                rounds=3, iterations=1)
+    assert counts.sum() == BATCH_RUNS * len(sequence)
@@ -0,0 +1,29 @@
+"""名单搜索：建立索引、按输入查询和增量更新"""
+import pytest
+from search_index import SearchIndex
+
+_indexes = {}
+
+
+@pytest.fixture
+def search_index(roster):
+    if len(roster) not in _indexes:
+        _indexes[len(roster)] = SearchIndex(roster)
+    return _indexes[len(roster)]
+
+
+def bench_build_index(benchmark, roster):
+    benchmark.pedantic(SearchIndex, args=(roster,), rounds=3, iterations=1)
+
+
+@pytest.mark.parametrize('query', ['员工', '999', '0000999'], ids=['all', 'digits', 'exact'])
+def bench_search(benchmark, search_index, query):
+    """搜索框每输入一个字符执行一次查询；'员工' 匹配全部条目，是最慢的情况"""
+    assert benchmark(search_index.search, query)
+
+
+def bench_index_rename(benchmark, roster):
+    """改名时只追加新出现的单字和两字"""
+    search_index = SearchIndex(roster)
+    names = iter(f"改名{i}" for i in range(10 ** 9))
+    benchmark(lambda: search_index.rename(1, next(names)))
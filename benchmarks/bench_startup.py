@@ -0,0 +1,48 @@
+"""冷启动：在新进程中从 import main 到主窗口显示、到名单读取完成的时间"""
+import os
+import sys
+import json
+import subprocess
+from data_management import DataManager
+from conftest import ROOT, make_rows
+from participant_store import ParticipantStore
+
+COLD_START_BUDGET = 0.5  # 秒：从进程开始导入到主窗口显示
+STARTUP_SCRIPT = '''
+import sys, time, json
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from PyQt5.QtWidgets import QApplication
+app = QApplication([])
+import main
+window = main.RandomNumberRolling()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+while window.load_worker is not None:
+    window.load_worker.wait(10)
+    app.processEvents()
+loaded = time.perf_counter()
+window.cancel_search_index()  # 搜索索引还在后台建立，退出前停止线程
+print(json.dumps({'shown': shown - started, 'loaded': loaded - started, 'size': len(window.entries)}))
+'''
+
+
+def start_app(home):
+    env = dict(os.environ, HOME=home)
+    output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, ROOT], env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def bench_cold_start(benchmark, size, tmp_path):
+    home = str(tmp_path)
+    os.environ['HOME'], previous = home, os.environ['HOME']
+    try:
+        DataManager().save_data(ParticipantStore(make_rows(size)))
+    finally:
+        os.environ['HOME'] = previous
+    timings = []
+    benchmark.pedantic(lambda: timings.append(start_app(home)), rounds=3, iterations=1)
+    benchmark.extra_info['loaded_s'] = max(timing['loaded'] for timing in timings)
+    assert all(timing['size'] == size for timing in timings)
+    assert max(timing['shown'] for timing in timings) < COLD_START_BUDGET
@@ -0,0 +1,86 @@
+"""界面热点：名单模型的分批加载和滚动显示每一帧（离屏 Qt）"""
+import random
+from PyQt5.QtCore import Qt, QModelIndex
+from main import EntryModel, FETCH_BATCH
+from rolling_window import RollingWindow
+from draw_session import DrawSession
+
+
+class DrawRecorder:
+    """代替主窗口接收中奖结果"""
+
+    def __init__(self):
+        self.winners = []
+
+    def record_draws(self, winners, prize):
+        self.winners.extend(winners)
+
+    def show(self):
+        pass
+
+
+def bench_model_refresh(benchmark, qapp, roster):
+    model = EntryModel(roster)
+    benchmark(model.refresh)
+
+
+def bench_model_fetch_more(benchmark, qapp, roster):
+    """滚动到底部时加载下一批行"""
+    model = EntryModel(roster)
+
+    def fetch():
+        if not model.canFetchMore(QModelIndex()):
+            model.refresh()
+        model.fetchMore(QModelIndex())
+
+    benchmark(fetch)
+
+
+def bench_model_page_data(benchmark, qapp, roster):
+    """视图绘制一屏（50 行）时读取的数据"""
+    model = EntryModel(roster)
+    while model.canFetchMore(QModelIndex()):
+        model.fetchMore(QModelIndex())
+    rng = random.Random(0)
+
+    def read_page():
+        start = rng.randrange(max(model.rowCount() - 50, 1))
+        for row in range(start, min(start + 50, model.rowCount())):
+            model.data(model.index(row, 0), Qt.DisplayRole)
+            model.data(model.index(row, 1), Qt.DisplayRole)
+
+    benchmark(read_page)
+
+
+def rolling_window(roster, tmp_path, count):
+    session = DrawSession(roster, 'bench', str(tmp_path))
+    window = RollingWindow(session, [{'name': '一等奖', 'count': count}], DrawRecorder())
+    window.resize(800, 600)
+    return window
+
+
+def bench_rolling_tick(benchmark, qapp, roster, tmp_path):
+    """update_rolling_display 加一次重绘"""
+    window = rolling_window(roster, tmp_path, 1)
+    window.is_rolling = True
+
+    def tick():
+        window.update_rolling_display()
+        window.display.repaint()
+
+    benchmark(tick)
+    window.session.close()
+
+
+def bench_pause_rolling(benchmark, qapp, roster, tmp_path):
+    """暂停抽奖：抽取、写日志、交给主窗口并重绘"""
+    rounds = min(200, len(roster) // 2)
+    window = rolling_window(roster, tmp_path, rounds + 1)
+
+    def pause():
+        window.pause_rolling()
+        window.display.repaint()
+
+    benchmark.pedantic(pause, rounds=rounds, iterations=1)
+    assert len(window.parent.winners) == rounds
+    window.session.close()
@@ -0,0 +1,66 @@
+"""
+性能基准的公共设置：合成名单、离屏 Qt 和基线存储位置。
+
+    python -m pytest benchmarks                                    # 1k 和 100k 名单
+    python -m pytest benchmarks --roster-sizes=1000,100000,1000000 # 加上 1M 名单
+    python -m pytest benchmarks --benchmark-save=baseline          # 更新基线
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:25%
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# 离屏运行 Qt；数据目录指向临时目录，不读写真实的 ~/.my_app_data
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ['HOME'] = tempfile.mkdtemp(prefix='lottery-bench-')
+
+import pytest
+from participant_store import ParticipantStore
+
+BASELINE_DIR = os.path.join(ROOT, 'benchmarks', 'baseline')
+DEFAULT_SIZES = '1000,100000'
+_rosters = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption('--roster-sizes', default=DEFAULT_SIZES, help='合成名单的人数，逗号分隔')
+
+
+def pytest_configure(config):
+    # 基线随仓库保存在 benchmarks/baseline，与从哪个目录运行无关
+    if config.getoption('benchmark_storage', None) == 'file://./.benchmarks':
+        config.option.benchmark_storage = 'file://' + BASELINE_DIR
+
+
+def pytest_generate_tests(metafunc):
+    if 'size' in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption('roster_sizes').split(',')]
+        metafunc.parametrize('size', sizes, ids=[f"{size // 1000}k" for size in sizes])
+
+
+def make_rows(size):
+    """合成名单：编号从 1 开始，姓名互不相同，每 10 人中有一人权重为 2"""
+    return [(i, f"员工{i:07d}", 2 if i % 10 == 0 else 1) for i in range(1, size + 1)]
+
+
+@pytest.fixture
+def roster(size):
+    """按人数缓存的合成名单，只读；会修改名单的基准使用 store"""
+    if size not in _rosters:
+        _rosters[size] = ParticipantStore(make_rows(size))
+    return _rosters[size]
+
+
+@pytest.fixture
+def store(roster):
+    """合成名单的副本，可以随意修改"""
+    return ParticipantStore(roster.rows())
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    yield app
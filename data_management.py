@@ -1,59 +1,240 @@
-import pandas as pd
 import os
 import json
+import sqlite3
+from participant_store import ParticipantStore
+from journal import Journal
+from profiler import timed
+from persistence import DebouncedWriter, write_json_atomic
 
-def get_data_path():
+# pandas 只在从旧版 data.xlsx 迁移时才加载，避免拖慢启动
+
+def get_app_dir():
     home = os.path.expanduser("~")
     data_dir = os.path.join(home, '.my_app_data')
     if not os.path.exists(data_dir):
         os.makedirs(data_dir)
-    return os.path.join(data_dir, 'data.xlsx')
+    return data_dir
+
+def get_data_path():
+    """旧版本使用的 Excel 名单文件，仅用于首次迁移"""
+    return os.path.join(get_app_dir(), 'data.xlsx')
+
+def get_db_path():
+    return os.path.join(get_app_dir(), 'data.db')
+
+def get_journal_path():
+    return os.path.join(get_app_dir(), 'journal.log')
+
+def get_prizes_path():
+    return os.path.join(get_app_dir(), 'prizes.json')
+
+def get_draws_dir():
+    """可复现抽奖的日志和名单快照目录"""
+    draws_dir = os.path.join(get_app_dir(), 'draws')
+    if not os.path.exists(draws_dir):
+        os.makedirs(draws_dir)
+    return draws_dir
 
 def get_settings_path():
-    home = os.path.expanduser("~")
-    settings_dir = os.path.join(home, '.my_app_data')
-    if not os.path.exists(settings_dir):
-        os.makedirs(settings_dir)
-    return os.path.join(settings_dir, 'settings.json')
+    return os.path.join(get_app_dir(), 'settings.json')
+
+class SqliteBackend:
+    """
+    默认的名单存储：单个 SQLite 文件，按添加顺序保存 (编号, 姓名, 权重) 和中奖记录 (奖品, 编号, 姓名)，
+    meta 表以 JSON 保存奖品和快照已包含的日志标识，与名单在同一个事务中写入。
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE IF NOT EXISTS entries (id INTEGER NOT NULL, name TEXT NOT NULL, weight REAL NOT NULL DEFAULT 1)")
+        conn.execute("CREATE TABLE IF NOT EXISTS winners (prize TEXT, id INTEGER NOT NULL, name TEXT NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(entries)")]
+        if 'weight' not in columns:
+            conn.execute("ALTER TABLE entries ADD COLUMN weight REAL NOT NULL DEFAULT 1")
+        return conn
+
+    def load(self, store, winners=None):
+        conn = self.connect()
+        try:
+            size = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            store.load(conn.execute("SELECT id, name, weight FROM entries ORDER BY rowid"), size)
+            if winners is not None:
+                winners[:] = conn.execute("SELECT prize, id, name FROM winners ORDER BY rowid").fetchall()
+        finally:
+            conn.close()
+
+    def load_meta(self, key):
+        """读取 meta 表中的一项，不存在时返回 None"""
+        if not self.exists():
+            return None
+        conn = self.connect()
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def save(self, store, winners=(), meta=None):
+        """在一个事务中替换名单和中奖记录，并写入 meta（{键: 可序列化为 JSON 的值}）"""
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM entries")
+                conn.executemany("INSERT INTO entries (id, name, weight) VALUES (?, ?, ?)", store.rows())
+                conn.execute("DELETE FROM winners")
+                conn.executemany("INSERT INTO winners (prize, id, name) VALUES (?, ?, ?)", winners)
+                conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                 [(key, json.dumps(value, ensure_ascii=False)) for key, value in (meta or {}).items()])
+        finally:
+            conn.close()
+
+class ExcelBackend:
+    """旧版的 Excel 名单文件（只读，用于迁移）：第一个工作表为名单（编号、姓名），可选的“中奖名单”工作表为中奖记录"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self, store, winners=None):
+        import pandas as pd
+        sheets = pd.read_excel(self.path, sheet_name=None)
+        frames = list(sheets.values())
+        skipped = store.load(frames[0].itertuples(index=False, name=None), len(frames[0])) if frames else 0
+        if winners is not None and '中奖名单' in sheets:
+            winners[:] = list(sheets['中奖名单'].itertuples(index=False, name=None))
+        return skipped
 
 class DataManager:
-    def load_data(self):
-        file_path = get_data_path()
+    """
+    名单、中奖记录、奖品和设置的读写。
+    设置和奖品的修改交给 DebouncedWriter 合并，稍后在后台线程写出；设置用写临时文件再改名的方式保存。
+    奖品的快照与名单、中奖记录一起保存在 data.db 中，之后的修改只写日志；settings.json 不再保存奖品。
+    """
+
+    def __init__(self, backend=None, journal=None, writer=None):
+        self.backend = backend if backend is not None else SqliteBackend(get_db_path())
+        self.journal = journal if journal is not None else Journal(get_journal_path())
+        self.writer = writer if writer is not None else DebouncedWriter()
+
+    @timed('data.load')
+    def load_data(self, store=None, winners=None):
+        """读取名单到 ParticipantStore（未传入时新建一个）并返回它；传入 winners 列表时一并读取中奖记录"""
+        if store is None:
+            store = ParticipantStore()
         try:
-            if os.path.exists(file_path):
-                df = pd.read_excel(file_path)
-                return list(df.itertuples(index=False, name=None))
+            if self.backend.exists():
+                self.backend.load(store, winners)
+            else:
+                # 首次使用新存储时，从旧版的 data.xlsx 迁移名单
+                legacy = ExcelBackend(get_data_path())
+                if legacy.exists():
+                    legacy.load(store, winners)
         except Exception as e:
             print(f"Error loading data: {e}")
-        return []
+        return store
 
-    def save_data(self, entries):
+    def load(self, prizes):
+        """读取名单和中奖记录，并在奖品 prizes 上重放日志，返回 (名单, 奖品, 中奖记录)；启动时在后台线程调用"""
+        store, winners = ParticipantStore(), []
+        self.load_data(store, winners)
+        self.replay_journal(store, prizes, winners)
+        return store, prizes, winners
+
+    @timed('data.save')
+    def save_data(self, store, winners=()):
         try:
-            df = pd.DataFrame(entries, columns=['编号', '姓名'])
-            df.to_excel(get_data_path(), index=False)
+            self.backend.save(store, winners)
+        except Exception as e:
+            print(f"Error saving data: {e}")
+
+    def record(self, op, **fields):
+        """把一次操作追加到日志"""
+        self.record_many([dict(op=op, **fields)])
+
+    def record_many(self, records):
+        # 先写出还在等待的奖品修改，保证日志中的顺序与实际操作顺序一致（抽奖会扣减奖品数量）
+        self.writer.flush('prizes')
+        try:
+            self.journal.append_many(records)
+        except OSError as e:
+            print(f"Error writing journal: {e}")
+
+    @timed('data.replay_journal')
+    def replay_journal(self, store, prizes, winners=None):
+        """在已加载的名单、奖品和中奖记录上重放上次快照之后的操作"""
+        try:
+            if self.journal.token() == self.backend.load_meta('journal'):
+                # 快照已包含这份日志（保存快照后、清空日志前程序中断），不再重放
+                self.journal.reset()
+                return 0
+            return self.journal.replay(store, prizes, winners)
+        except Exception as e:
+            print(f"Error replaying journal: {e}")
+        return 0
+
+    @timed('data.checkpoint')
+    def checkpoint(self, store, prizes, winners=()):
+        """保存名单、奖品和中奖记录的完整快照，然后清空日志"""
+        self.writer.flush('prizes')
+        try:
+            # 快照连同它包含的日志标识在同一个事务中写入：清空日志前中断时，启动后不会把日志再应用一遍
+            self.backend.save(store, winners, {'prizes': prizes, 'journal': self.journal.token()})
+            self.journal.reset()
         except Exception as e:
             print(f"Error saving data: {e}")
 
     def load_settings(self):
         settings_path = get_settings_path()
         if os.path.exists(settings_path):
-            with open(settings_path, 'r') as f:
+            with open(settings_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         return {}
 
+    @timed('settings.save')
     def save_settings(self, settings):
-        settings_path = get_settings_path()
-        with open(settings_path, 'w') as f:
-            json.dump(settings, f)
+        """记下最新的设置，稍后在后台线程写出"""
+        self.writer.schedule('settings', self.write_settings, dict(settings))
+
+    @timed('settings.write')
+    def write_settings(self, settings):
+        write_json_atomic(get_settings_path(), settings)
 
     def load_prizes(self):
-        prize_file_path = os.path.join(os.path.expanduser("~"), '.my_app_data', 'prizes.json')
+        try:
+            prizes = self.backend.load_meta('prizes')
+            if prizes is not None:
+                return prizes
+        except Exception as e:
+            print(f"Error loading prizes: {e}")
+        # 旧版本把奖品快照保存在 prizes.json 中
+        prize_file_path = get_prizes_path()
         if os.path.exists(prize_file_path):
-            with open(prize_file_path, 'r') as f:
+            with open(prize_file_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
-        return []
+        # 旧版本把奖品同时存在 settings.json 中，没有 prizes.json 时从那里迁移
+        return self.load_settings().get('prizes', [])
 
+    @timed('prizes.save')
     def save_prizes(self, prizes):
-        prize_file_path = os.path.join(os.path.expanduser("~"), '.my_app_data', 'prizes.json')
-        with open(prize_file_path, 'w') as f:
-            json.dump(prizes, f)
\ No newline at end of file
+        """奖品修改合并后只追加一条日志（在后台线程写出），奖品的快照在 checkpoint 时才重写"""
+        self.writer.schedule('prizes', self.append_prizes, [dict(prize) for prize in prizes])
+
+    def append_prizes(self, prizes):
+        try:
+            self.journal.append('prizes', prizes=prizes)
+        except OSError as e:
+            print(f"Error writing journal: {e}")
+
+    def close(self):
+        """退出前调用：写出等待中的修改，停止后台线程并关闭日志"""
+        self.writer.close()
+        self.journal.close()
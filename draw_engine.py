@@ -0,0 +1,200 @@
+import random
+from array import array
+from participant_store import ParticipantStore
+
+
+class FenwickSampler:
+    """
+    按权重抽样：树状数组保存各位置权重的前缀和，抽样和修改权重都是 O(log n)。
+    位置就是引擎中的行号，固定不变；移除时把权重置 0，因此抽走中奖者后无需重建。
+    """
+
+    def __init__(self, ids, weights):
+        self.weights = array('d', (weights.get(entry_id, 1) for entry_id in ids))
+        n = len(self.weights)
+        self.tree = array('d', [0]) + self.weights
+        for i in range(1, n + 1):  # O(n) 建树
+            parent = i + (i & -i)
+            if parent <= n:
+                self.tree[parent] += self.tree[i]
+        self.top = 1 << n.bit_length() if n else 0
+
+    def update(self, position, delta):
+        i = position + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def total(self):
+        i, total = len(self.tree) - 1, 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def remove(self, position):
+        if self.weights[position]:
+            self.update(position, -self.weights[position])
+            self.weights[position] = 0
+
+    def pick(self, rng):
+        """按权重随机返回一个位置，总权重为 0 时返回 None"""
+        total = self.total()
+        if total <= 0:
+            return None
+        while True:
+            target = rng.random() * total
+            i, step = 0, self.top
+            while step:
+                nxt = i + step
+                if nxt < len(self.tree) and self.tree[nxt] <= target:
+                    i = nxt
+                    target -= self.tree[nxt]
+                step >>= 1
+            # 浮点误差可能落在权重为 0 的位置上，重新抽一次即可
+            if i < len(self.weights) and self.weights[i] > 0:
+                return i
+
+
+class DrawEngine:
+    """
+    抽奖引擎：维护候选池，随机抽取与移除均为 O(1)，不依赖 Qt。
+    直接引用名单的各列（行 -> 编号、姓名），不复制；候选池只保存行号，
+    姓名在抽中或滚动显示时才解码，不为每个人创建元组。
+    名单压缩时换上新的数组，引擎仍引用建池时的那几块，行号不受影响；名单在末尾追加的行不进入候选池。
+    移除时把候选池末尾的行换到被移除的位置；按编号查找时用名单的编号表，名单已压缩过时才建 编号 -> 行 的字典。
+    传入 weights（编号 -> 权重，缺省为 1）且不为空时，改用 FenwickSampler 按权重抽取，每次 O(log n)。
+    名单在一段抽奖期间只能移除已中奖的条目，其他修改（改名会就地改写姓名列）应结束这一段并重建引擎。
+    """
+
+    def __init__(self, store=None, rng=None, weights=None):
+        self.rng = rng if rng is not None else random.Random()
+        self.store = store if store is not None else ParticipantStore()
+        self.store.compact()  # 行号必须连续，与校验时从名单快照建的引擎一致
+        store = self.store
+        self.ids, self.name_start, self.name_length, self.name_data = store.id_column, store.name_start, store.name_length, store.name_data
+        self.pool = array('q', range(len(self.ids)))  # 候选池中的行
+        self.slots = array('q', self.pool)  # 行 -> 在候选池中的位置，已移出为 -1
+        self.rows = None  # 编号 -> 行，名单压缩过、行号与名单不再一致时才建立
+        self.winners = []  # 按抽取顺序记录已中奖的条目
+        self.sampler = FenwickSampler(self.ids, weights) if weights else None
+
+    def __len__(self):
+        return len(self.pool)
+
+    def __bool__(self):
+        return bool(self.pool)
+
+    def __contains__(self, entry_id):
+        return self.row_of(entry_id) is not None
+
+    def __iter__(self):
+        return (self.entry(row) for row in self.pool)
+
+    def entry(self, row):
+        """按行取 (编号, 姓名)"""
+        start = self.name_start[row]
+        return (self.ids[row], self.name_data[start:start + self.name_length[row]].decode('utf-8'))
+
+    def row_of(self, entry_id):
+        """编号在候选池中的行，不在池中时返回 None"""
+        if self.store.id_column is self.ids:
+            row = self.store.id_row(entry_id)  # 名单还没压缩过，行号与名单相同
+        else:
+            if self.rows is None:
+                self.rows = dict(zip(self.ids, range(len(self.slots))))
+            row = self.rows.get(entry_id)
+        return row if row is not None and row < len(self.slots) and self.slots[row] >= 0 else None
+
+    def remove(self, entry_id):
+        """按编号移除条目并返回它，不存在时返回 None"""
+        row = self.row_of(entry_id)
+        if row is None:
+            return None
+        self.remove_row(row)
+        return self.entry(row)
+
+    def remove_row(self, row):
+        slot = self.slots[row]
+        last = self.pool.pop()
+        if slot < len(self.pool):
+            self.pool[slot] = last
+            self.slots[last] = slot
+        self.slots[row] = -1
+        if self.sampler is not None:
+            self.sampler.remove(row)
+
+    def pick_row(self):
+        if not self.pool:
+            return None
+        if self.sampler is not None:
+            return self.sampler.pick(self.rng)
+        return self.pool[self.rng.randrange(len(self.pool))]
+
+    def draw(self):
+        """随机抽取一个条目并将其移出候选池，池为空时返回 None"""
+        row = self.pick_row()
+        if row is None:
+            return None
+        self.remove_row(row)
+        entry = self.entry(row)
+        self.winners.append(entry)
+        return entry
+
+    def pop_winners(self):
+        """取出并清空已中奖记录"""
+        winners, self.winners = self.winners, []
+        return winners
+
+    def draw_many(self, k):
+        """不放回地一次抽取 k 个不同的条目，k 超过池大小时抽完为止；耗时只与 k 成正比"""
+        winners = []
+        for _ in range(min(max(k, 0), len(self.pool))):
+            entry = self.draw()
+            if entry is None:
+                break
+            winners.append(entry)
+        return winners
+
+
+class LazyShuffle:
+    """
+    按需生成候选池的随机顺序，供滚动显示使用，不复制名单。
+    每一轮用满周期的线性同余序列遍历 [0, 2^k)（2^k 是不小于池大小的最小 2 的幂），
+    再经过一次可逆的位混合，跳过超出池大小的下标；一轮内每个条目恰好出现一次。
+    额外内存 O(1)，每帧期望 O(1)（平均跳过不到一个下标）。
+    使用独立的随机数生成器，不影响抽奖本身。
+    """
+
+    def __init__(self, engine, rng=None):
+        self.engine = engine
+        self.rng = rng if rng is not None else random.Random()
+        self.size = 0  # 当前一轮覆盖的下标范围 2^k
+        self.remaining = 0
+
+    def start_cycle(self, n):
+        bits = max((n - 1).bit_length(), 2)
+        self.size = 1 << bits
+        self.mask = self.size - 1
+        self.shift = max(bits // 2, 1)
+        self.multiplier = ((self.rng.getrandbits(bits) << 2) | 1) & self.mask  # a ≡ 1 (mod 4)
+        self.increment = self.rng.getrandbits(bits) | 1  # c 为奇数
+        self.scramble = self.rng.getrandbits(bits) | 1  # 奇数乘子，模 2^k 可逆
+        self.state = self.rng.getrandbits(bits)
+        self.remaining = self.size
+
+    def next(self):
+        """返回下一个要显示的条目，池为空时返回 None"""
+        pool = self.engine.pool
+        n = len(pool)
+        if not n:
+            return None
+        while True:
+            if not self.remaining or n > self.size:
+                self.start_cycle(n)
+            self.state = (self.multiplier * self.state + self.increment) & self.mask
+            self.remaining -= 1
+            index = self.state ^ (self.state >> self.shift)
+            index = (index * self.scramble) & self.mask
+            if index < n:
+                return self.engine.entry(pool[index])
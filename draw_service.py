@@ -0,0 +1,399 @@
+import os
+import json
+import base64
+import struct
+import asyncio
+import hashlib
+from collections import deque
+from draw_engine import LazyShuffle
+from draw_session import DrawSession, build_engine
+from importer import parse_weight
+from prize_scheduler import PrizeScheduler, ORDERED
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found'}
+
+
+def encode_frame(payload, opcode=0x1, mask=False):
+    """编码一个 WebSocket 帧；服务端发出的帧不加掩码，客户端发出的必须加掩码"""
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    n = len(payload)
+    if n < 126:
+        header.append(mask_bit | n)
+    elif n < 65536:
+        header.append(mask_bit | 126)
+        header += struct.pack('!H', n)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack('!Q', n)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return bytes(header) + payload
+
+
+async def read_frame(reader):
+    """读取一个 WebSocket 帧，返回 (opcode, payload)；消息都很小，不处理分片"""
+    first, second = await reader.readexactly(2)
+    n = second & 0x7f
+    if n == 126:
+        n = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif n == 127:
+        n = struct.unpack('!Q', await reader.readexactly(8))[0]
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(n)
+    if key:
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return first & 0x0f, payload
+
+
+def encode_message(message):
+    return encode_frame(json.dumps(message, ensure_ascii=False).encode('utf-8'))
+
+
+def parse_count(count):
+    """POST /draw 的 count：正整数或 'all'，否则抛出 ValueError"""
+    if count == 'all':
+        return count
+    try:
+        value = int(count)
+    except (TypeError, ValueError, OverflowError):
+        value = 0
+    if isinstance(count, bool) or value != count and not isinstance(count, str) or value < 1:
+        raise ValueError(f"count 应为正整数或 'all'：{json.dumps(count, ensure_ascii=False)}")
+    return value
+
+
+class Subscriber:
+    """
+    一个显示端：待发送的消息和连接；消息只编码一次，所有订阅者共享同一份字节。
+    中奖结果、状态等消息按顺序排队，从不丢弃；滚动帧只保留最新的一帧，发送跟不上时旧帧被新帧替换。
+    """
+
+    def __init__(self, writer):
+        self.messages = deque()
+        self.frame = None  # 尚未发出的最新滚动帧
+        self.ready = asyncio.Event()
+        self.dropped = 0  # 被替换、没有发出的滚动帧数
+        self.writer = writer
+        self.reader_task = asyncio.current_task()  # 读取这个连接的任务
+        self.sender = None  # 把队列写入连接的任务
+
+    def close(self):
+        """停止发送并关闭连接；读取任务随连接关闭而结束"""
+        if self.sender is not None:
+            self.sender.cancel()
+        if not self.writer.is_closing():
+            self.writer.write(encode_frame(b'', 0x8))
+            self.writer.close()
+
+    def offer(self, frame, droppable=False):
+        if self.frame is not None:
+            # 未发出的滚动帧已过时；在其他消息之后发出会显示已被抽走的人，也一并丢弃
+            self.frame = None
+            self.dropped += 1
+        if droppable:
+            self.frame = frame
+        else:
+            self.messages.append(frame)
+        self.ready.set()
+
+    async def next(self):
+        """下一条要发送的消息：先发排队的消息，再发最新的滚动帧"""
+        while not self.messages and self.frame is None:
+            self.ready.clear()
+            await self.ready.wait()
+        if self.messages:
+            return self.messages.popleft()
+        frame, self.frame = self.frame, None
+        return frame
+
+
+class DrawService:
+    """
+    本地抽奖服务：持有名单、奖品和中奖记录，提供 HTTP 接口
+    （GET /status，POST /add、/draw、/rolling），
+    并通过 WebSocket（/ws）向任意数量的显示屏推送滚动帧和中奖结果。
+    抽奖规则与界面相同：按调度顺序抽取奖项，抽中即移出名单。
+    """
+
+    def __init__(self, store, prizes, winners=None, seed='', data_manager=None, log_dir=None, interval=0.1,
+                 schedule=ORDERED):
+        self.store = store
+        self.prizes = prizes
+        self.scheduler = PrizeScheduler(prizes, schedule)
+        self.winners = winners if winners is not None else []
+        self.seed = seed
+        self.data_manager = data_manager
+        self.log_dir = log_dir
+        self.interval = interval
+        self.segment = 0
+        self.engine = None
+        self.session = None
+        self.shuffle = None
+        self.subscribers = set()
+        self.rolling_task = None
+        self.server = None
+
+    # ---- 抽奖状态 ----
+
+    def ensure_engine(self):
+        """名单修改后开始新的一段抽奖；指定了日志目录时写可校验的抽奖日志"""
+        if self.engine is None:
+            if self.log_dir:
+                self.session = DrawSession(self.store, self.seed, self.log_dir, self.segment)
+                self.engine = self.session.engine
+            else:
+                self.engine = build_engine(self.store, str(self.seed), self.segment)
+            self.segment += 1
+            self.shuffle = LazyShuffle(self.engine)
+        return self.engine
+
+    def end_session(self):
+        if self.session is not None:
+            self.session.close()
+        self.session = None
+        self.engine = None
+        self.shuffle = None
+
+    def status(self):
+        index = self.scheduler.current()
+        return {
+            'type': 'status',
+            'participants': len(self.store),
+            'winners': len(self.winners),
+            'rolling': self.rolling_task is not None,
+            'prize': self.prizes[index] if index is not None else None,
+            'prizes': self.prizes,
+            'subscribers': len(self.subscribers),
+        }
+
+    def add(self, name, weight=1):
+        name = str(name).strip()
+        if not name:
+            raise ValueError("请输入姓名！")
+        try:
+            weight = parse_weight(weight)
+        except (TypeError, ValueError):
+            raise ValueError(f"权重应为非负数：{json.dumps(weight, ensure_ascii=False)}")
+        entry_id = self.store.add(name, None, weight)
+        if entry_id is None:
+            raise ValueError(f"条目 '{name}' 已存在！")
+        self.end_session()
+        if self.data_manager is not None:
+            self.data_manager.record('add', id=entry_id, name=name, weight=weight)
+        self.broadcast(self.status())
+        return {'id': entry_id, 'name': name}
+
+    def draw(self, count=1):
+        """为当前奖项抽取 count 人（'all' 表示抽完剩余名额），推送结果"""
+        count = parse_count(count)
+        index = self.scheduler.current()
+        if index is None:
+            raise ValueError("没有可用的奖品或奖品数量为0。")
+        prize = self.prizes[index]
+        count = prize['count'] if count == 'all' else min(count, prize['count'])
+        engine = self.ensure_engine()
+        drawn = self.session.draw_many(count, index) if self.session is not None else engine.draw_many(count)
+        if not drawn:
+            raise ValueError("没有可用的抽奖条目！")
+        self.scheduler.record(index, len(drawn))
+        records = []
+        for entry in drawn:
+            self.store.remove(entry[0])
+            self.winners.append((prize['name'], entry[0], entry[1]))
+            records.append({'op': 'draw', 'id': entry[0], 'prize': index})
+        if self.data_manager is not None:
+            self.data_manager.record_many(records)
+        message = {'type': 'winners', 'prize': prize['name'], 'winners': [list(entry) for entry in drawn]}
+        self.broadcast(message)
+        self.broadcast(self.status())
+        return message
+
+    # ---- 推送 ----
+
+    def broadcast(self, message, droppable=False):
+        if not self.subscribers:
+            return
+        frame = encode_message(message)
+        for subscriber in self.subscribers:
+            subscriber.offer(frame, droppable)
+
+    def set_rolling(self, on):
+        if on and self.rolling_task is None:
+            self.ensure_engine()
+            self.rolling_task = asyncio.ensure_future(self.roll())
+        elif not on and self.rolling_task is not None:
+            self.rolling_task.cancel()
+            self.rolling_task = None
+        self.broadcast(self.status())
+        return self.status()
+
+    async def roll(self):
+        """滚动帧：按需生成随机顺序，帧可以丢弃，慢的显示端不会拖慢其他显示端"""
+        while True:
+            if self.shuffle is None:
+                self.ensure_engine()  # 添加条目后上一段已结束，按新名单继续滚动
+            entry = self.shuffle.next()
+            if entry is not None:
+                self.broadcast({'type': 'frame', 'id': entry[0], 'name': entry[1]}, droppable=True)
+            await asyncio.sleep(self.interval)
+
+    # ---- 网络 ----
+
+    async def start(self, host='127.0.0.1', port=8765):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.set_rolling(False)
+        self.end_session()
+        if self.server is not None:
+            self.server.close()
+        # 关闭所有显示端的连接，并等各连接的读取和发送任务结束，退出时不留下挂起的任务
+        subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.close()
+        await asyncio.gather(*[subscriber.reader_task for subscriber in subscribers],
+                             *[subscriber.sender for subscriber in subscribers if subscriber.sender is not None],
+                             return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+
+    def route(self, method, path, body):
+        if method == 'GET' and path == '/status':
+            return 200, self.status()
+        if method == 'POST' and path == '/add':
+            return 200, self.add(body.get('name', ''), body.get('weight', 1))
+        if method == 'POST' and path == '/draw':
+            return 200, self.draw(body.get('count', 1))
+        if method == 'POST' and path == '/rolling':
+            return 200, self.set_rolling(bool(body.get('on', True)))
+        return 404, {'error': f"未知接口 {method} {path}"}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        lines = request.decode('latin-1').split('\r\n')
+        request_line = lines[0].split(' ')
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+        if len(request_line) != 3 or not request_line[2].startswith('HTTP/'):
+            await self.respond(writer, 400, {'error': f"无效的请求行：{lines[0][:100]}"})
+            return
+        method, path = request_line[:2]
+        if path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+            if 'sec-websocket-key' not in headers:
+                await self.respond(writer, 400, {'error': "缺少 Sec-WebSocket-Key"})
+                return
+            await self.serve_websocket(reader, writer, headers)
+            return
+        try:
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            body = json.loads(body) if body else {}
+            if not isinstance(body, dict):
+                raise ValueError("请求体应为 JSON 对象")
+            status, result = self.route(method, path, body)
+        except ValueError as e:  # 包括 JSON 和编码错误
+            status, result = 400, {'error': str(e)}
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()  # 请求体不完整，客户端已断开
+            return
+        await self.respond(writer, status, result)
+
+    async def respond(self, writer, status, result):
+        payload = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode('latin-1') + payload
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass  # 客户端已断开
+        finally:
+            writer.close()
+
+    async def serve_websocket(self, reader, writer, headers):
+        accept = base64.b64encode(hashlib.sha1((headers['sec-websocket-key'] + WS_GUID).encode()).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        subscriber = Subscriber(writer)
+        subscriber.offer(encode_message(self.status()))
+        self.subscribers.add(subscriber)
+        subscriber.sender = asyncio.ensure_future(self.pump(subscriber, writer))
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    subscriber.offer(encode_frame(payload, 0xA))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            subscriber.close()
+
+    async def pump(self, subscriber, writer):
+        try:
+            while True:
+                writer.write(await subscriber.next())
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+
+class DisplayClient:
+    """回环 WebSocket 客户端：可以代替真实的显示屏接收滚动帧和中奖结果，也便于测试"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=8765):
+        reader, writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write(f"GET /ws HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode('latin-1'))
+        response = await reader.readuntil(b'\r\n\r\n')
+        if b' 101 ' not in response.split(b'\r\n', 1)[0]:
+            raise ConnectionError(response.decode('latin-1'))
+        return cls(reader, writer)
+
+    async def receive(self):
+        """接收下一条推送消息（dict）"""
+        while True:
+            opcode, payload = await read_frame(self.reader)
+            if opcode == 0x1:
+                return json.loads(payload)
+            if opcode == 0x8:
+                raise ConnectionError("服务已关闭连接")
+
+    async def close(self):
+        self.writer.write(encode_frame(b'', 0x8, mask=True))
+        await self.writer.drain()
+        self.writer.close()
+
+
+async def request(method, path, body=None, host='127.0.0.1', port=8765):
+    """最小的 HTTP 客户端，返回 (状态码, dict)"""
+    reader, writer = await asyncio.open_connection(host, port)
+    payload = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode('latin-1') + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b'\r\n\r\n')
+    return int(head.split(b' ')[1]), json.loads(content)
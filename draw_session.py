@@ -0,0 +1,153 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import itertools
+import hashlib
+from draw_engine import DrawEngine
+from participant_store import ParticipantStore
+
+LOG_SUFFIX = '.draws'
+ROSTER_SUFFIX = '.roster.csv'
+
+
+def derive_seed(seed, segment):
+    """每一段抽奖使用 种子:段号 作为随机数种子，公布一个种子即可复现整场活动"""
+    return f"{seed}:{segment}"
+
+
+def roster_fingerprint(rows):
+    """名单指纹：按顺序对 (编号, 姓名, 权重) 做 SHA-256"""
+    digest = hashlib.sha256()
+    for entry_id, name, weight in rows:
+        digest.update(f"{entry_id}\t{name}\t{weight!r}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def build_engine(store, seed, segment):
+    """按名单的行顺序建立抽奖引擎；抽奖和校验都通过这里建引擎，保证抽取顺序一致"""
+    rng = random.Random(derive_seed(seed, segment))
+    return DrawEngine(store, rng=rng, weights=store.weights)
+
+
+def create_files(stem):
+    """
+    以独占方式新建日志和名单快照文件，返回打开的 (日志, 快照)。
+    同一秒内开始的多段抽奖（如连续运行命令行）文件名相同，依次加上 _1、_2 ……，已有的日志从不覆盖。
+    """
+    for attempt in itertools.count():
+        path = stem if not attempt else f"{stem}_{attempt}"
+        try:
+            log = open(path + LOG_SUFFIX, 'x', encoding='utf-8')
+        except FileExistsError:
+            continue
+        try:
+            return log, open(path + ROSTER_SUFFIX, 'x', encoding='utf-8', newline='')
+        except FileExistsError:
+            # 只留下了同名的名单快照，放弃这个名字
+            log.close()
+            os.remove(log.name)
+
+
+class DrawSession:
+    """
+    一段可复现、可审计的抽奖：独立的带种子随机数生成器，开始时保存名单快照，
+    之后每抽一人在日志中写一行：序号、奖项、抽取前的池大小、中奖编号。
+    名单被修改后应结束本段，下一次抽奖开始新的一段（段号加一）。
+    """
+
+    def __init__(self, store, seed, log_dir, segment=0):
+        self.seed = str(seed)
+        self.segment = segment
+        self.engine = build_engine(store, self.seed, segment)
+        self.counter = 0
+
+        os.makedirs(log_dir, exist_ok=True)
+        self.log, roster = create_files(os.path.join(log_dir, f"session_{time.strftime('%Y%m%d%H%M%S')}_{segment}"))
+        self.log_path, self.roster_path = self.log.name, roster.name
+        with roster as f:
+            writer = csv.writer(f)
+            writer.writerow(['编号', '姓名', '权重'])
+            writer.writerows(store.rows())
+        header = {
+            'seed': self.seed,
+            'segment': segment,
+            'roster': os.path.basename(self.roster_path),
+            'fingerprint': roster_fingerprint(store.rows()),
+            'size': len(store),
+        }
+        self.log.write(json.dumps(header, ensure_ascii=False) + '\n')
+        self.log.flush()
+
+    def draw(self, prize=None):
+        """抽取一人并写入日志，池为空时返回 None"""
+        winners = self.draw_many(1, prize)
+        return winners[0] if winners else None
+
+    def draw_many(self, k, prize=None):
+        """不放回地抽取 k 人，每人一行日志，整批只 flush 一次"""
+        lines = []
+        winners = []
+        for _ in range(k):
+            pool_size = len(self.engine)
+            entry = self.engine.draw()
+            if entry is None:
+                break
+            winners.append(entry)
+            lines.append(f"{self.counter}\t{-1 if prize is None else prize}\t{pool_size}\t{entry[0]}\n")
+            self.counter += 1
+        if lines:
+            self.log.writelines(lines)
+            self.log.flush()
+        return winners
+
+    def close(self):
+        if not self.log.closed:
+            self.log.close()
+
+
+def read_roster(path):
+    rows = []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for entry_id, name, weight in reader:
+            # 保持写出时的数值类型（整数或小数），指纹才能一致
+            weight = float(weight) if any(c in weight for c in '.eE') else int(weight)
+            rows.append((int(entry_id), name, weight))
+    return rows
+
+
+def verify_log(log_path, roster_path=None):
+    """
+    用日志头中的种子和名单快照重放整段抽奖，逐行核对池大小和中奖编号。
+    返回 (是否一致, 已核对的抽取次数, 说明)。
+    """
+    with open(log_path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if roster_path is None:
+            roster_path = os.path.join(os.path.dirname(log_path), header['roster'])
+        rows = read_roster(roster_path)
+        if roster_fingerprint(rows) != header['fingerprint']:
+            return False, 0, "名单快照与日志记录的指纹不一致"
+        engine = build_engine(ParticipantStore(rows), header['seed'], header['segment'])
+        checked = 0
+        for line in f:
+            counter, _, pool_size, winner_id = line.split('\t')
+            if int(counter) != checked:
+                return False, checked, f"第 {checked} 次抽取的序号不连续"
+            if int(pool_size) != len(engine):
+                return False, checked, f"第 {checked} 次抽取时池大小不一致"
+            entry = engine.draw()
+            if entry is None or entry[0] != int(winner_id):
+                return False, checked, f"第 {checked} 次抽取的中奖编号不一致"
+            checked += 1
+    return True, checked, "全部一致"
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        ok, checked, message = verify_log(path)
+        print(f"{path}: {'通过' if ok else '失败'}，核对 {checked} 次抽取，{message}")
@@ -0,0 +1,153 @@
+import re
+import unicodedata
+from operator import add
+
+# 姓名中常见的繁体字 -> 简体字；只需覆盖名单里常见的字，繁简混用的名单规范化后即可对上
+TRADITIONAL = (
+    '陳陈張张劉刘黃黄趙赵楊杨吳吴孫孙馬马許许鄭郑謝谢韓韩馮冯鄧邓蕭萧葉叶蘇苏盧卢蔣蒋羅罗鍾钟鐘钟譚谭'
+    '龍龙錢钱鄒邹陸陆賈贾歐欧區区龔龚賴赖顧顾聶聂湯汤溫温鄔邬嚴严閆闫魯鲁齊齐顏颜寧宁衛卫萬万關关'
+    '偉伟國国華华東东輝辉傑杰軍军麗丽紅红鳳凤雲云飛飞濤涛強强寶宝貴贵義义愛爱誠诚樂乐蘭兰鵬鹏嬌娇'
+    '靜静歡欢禮礼榮荣慶庆聖圣順顺達达學学賢贤陽阳廣广長长興兴書书鳴鸣進进瑩莹聰聪穎颖婭娅鈺钰銀银'
+    '錦锦開开劍剑億亿潔洁瓊琼蓮莲夢梦憶忆語语詩诗綺绮維维紹绍綠绿藝艺嶺岭峯峰雙双鐵铁鋒锋權权瑋玮'
+    '員员職职業业團团隊队門门'
+)
+CANONICAL = str.maketrans(TRADITIONAL[0::2], TRADITIONAL[1::2], '·•・.-_\'"()（）\0')
+MIN_SIMILAR_LENGTH = 4  # 规范化后至少这么长的姓名才比较相似度；中文姓名只有两三个字，差一个字就是另一个人
+SIMILARITY = 0.7  # 两字组合集合的 Jaccard 相似度不低于此值视为相似
+# MinHash 签名分为 BANDS 段、每段 ROWS 个值，任意一段相同的姓名才进一步比较；
+# 相似度 0.75 的一对约 93% 的概率被找出，0.85 以上几乎不会漏掉，0.4 的只有约 1% 成为候选
+BANDS, ROWS = 10, 5
+MAX_BUCKET = 200  # 同一段签名下的姓名超过此数时跳过该段，避免退化为两两比较
+DIGITS = re.compile(r'\d+')
+REASONS = {'same': '规范化后相同', 'similar': '相似'}
+
+
+def canonical_name(name):
+    """判断重复时使用的姓名：全角转半角（NFKC）、去掉空白和常见标点、忽略大小写、繁体字转为简体"""
+    text = ''.join(unicodedata.normalize('NFKC', name).split())
+    return text.casefold().translate(CANONICAL)
+
+
+def bigrams(text):
+    """相邻两字的集合，末尾的字与结束符 \\0 也算一组（与 minhash 一致）"""
+    return set(map(add, text, text[1:] + '\0'))
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+def minhash(texts, seed=0):
+    """
+    每个姓名的 MinHash 签名（numpy 数组，每行 BANDS * ROWS 个值）。
+    所有姓名用 \\0 连接后按 UTF-32 一次取出码位，相邻两个码位拼成一个两字组合的编码，不逐个构造字符串；
+    每个哈希函数对全部两字组合算一遍 (a * x + b) >> 32，再按姓名分段取最小。
+    """
+    import numpy as np
+    random = np.random.default_rng(seed)
+    points = np.frombuffer(('\0'.join(texts) + '\0').encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    codes = ((points[:-1] << np.uint64(21)) | points[1:])[points[:-1] != 0]
+    offsets = np.zeros(len(texts), dtype=np.int64)
+    np.cumsum([len(text) for text in texts[:-1]], out=offsets[1:])
+    signature = np.empty((len(texts), BANDS * ROWS), dtype=np.uint64)
+    for column in range(BANDS * ROWS):
+        a, b = random.integers(1, 2 ** 63, size=2, dtype=np.uint64)
+        hashes = (codes * (a | np.uint64(1)) + b) >> np.uint64(32)
+        signature[:, column] = np.minimum.reduceat(hashes, offsets)
+    return signature
+
+
+def candidate_pairs(signature, groups):
+    """
+    MinHash 分段分桶：任意一段签名相同、且 groups 相同（姓名中的数字相同）的姓名两两组成候选对，
+    按签名估计的相似度初筛后返回 (a, b) 数组；超过 MAX_BUCKET 人的桶跳过。
+    """
+    import numpy as np
+    count = len(signature)
+    groups = np.asarray(groups, dtype=np.uint64)
+    weights = np.arange(1, ROWS + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    firsts, seconds = [], []
+    for band in range(BANDS):
+        keys = (signature[:, band * ROWS:(band + 1) * ROWS] * weights).sum(axis=1) ^ (groups * np.uint64(0xC2B2AE3D27D4EB4F))
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        sizes = np.diff(np.r_[starts, count])
+        for size in np.unique(sizes):
+            if size < 2 or size > MAX_BUCKET:
+                continue
+            members = order[starts[sizes == size][:, None] + np.arange(size)]
+            upper = np.triu_indices(size, 1)
+            firsts.append(members[:, upper[0]].ravel())
+            seconds.append(members[:, upper[1]].ravel())
+    if not firsts:
+        return np.empty((0, 2), dtype=np.int64)
+    first, second = np.concatenate(firsts), np.concatenate(seconds)
+    pairs = np.unique(np.minimum(first, second) * count + np.maximum(first, second))
+    first, second = pairs // count, pairs % count
+    # 签名中相同的位置所占比例是 Jaccard 相似度的估计值，明显低于阈值的不再精确比较
+    agree = np.empty(len(pairs))
+    for chunk in range(0, len(pairs), 1 << 20):
+        part = slice(chunk, chunk + (1 << 20))
+        agree[part] = (signature[first[part]] == signature[second[part]]).mean(axis=1)
+    keep = agree >= SIMILARITY - 0.15
+    return np.stack([first[keep], second[keep]], axis=1)
+
+
+def find_suspects(entries, cancelled=None):
+    """
+    找出名单中疑似重复的人，返回 [(原因, [(编号, 姓名), ...]), ...]，原因见 REASONS。
+    规范化后相同的归为一组；较长的姓名（如英文名）再用 MinHash 分段分桶找出相似的，
+    只比较落在同一个桶里的姓名，不做两两比较。姓名中的数字必须完全相同才算相似（如"员工0001"和"员工0002"不算）。
+    entries 为 [(编号, 姓名)]；cancelled() 返回 True 时提前返回 None。
+    """
+    by_key = {}
+    for entry in entries:
+        by_key.setdefault(canonical_name(entry[1]), []).append(entry)
+    suspects = [('same', group) for group in by_key.values() if len(group) > 1]
+    if cancelled is not None and cancelled():
+        return None
+    keys = [key for key in by_key if len(key) >= MIN_SIMILAR_LENGTH]
+    if len(keys) < 2:
+        return suspects
+
+    digit_groups = {}
+    texts, groups = [], []
+    for key in keys:
+        digits = () if key.isalpha() else tuple(DIGITS.findall(key))
+        texts.append(DIGITS.sub('#', key) if digits else key)
+        groups.append(digit_groups.setdefault(digits, len(digit_groups)))
+    pairs = candidate_pairs(minhash(texts), groups)
+    if cancelled is not None and cancelled():
+        return None
+
+    parent = {}  # 并查集：相似的姓名合并为一组
+
+    def root(position):
+        while parent.get(position, position) != position:
+            position = parent[position]
+        return position
+
+    grams = {}
+    for a, b in pairs.tolist():
+        if a not in grams:
+            grams[a] = bigrams(texts[a])
+        if b not in grams:
+            grams[b] = bigrams(texts[b])
+        if jaccard(grams[a], grams[b]) >= SIMILARITY:
+            top = root(a)
+            parent.setdefault(top, top)
+            parent[root(b)] = top
+    similar = {}
+    for position in parent:
+        similar.setdefault(root(position), set()).add(position)
+    for members in similar.values():
+        group = [entry for position in sorted(members) for entry in by_key[keys[position]]]
+        suspects.append(('similar', group))
+    return suspects
+
+
+def describe(suspects):
+    """每组疑似重复一行，如 '规范化后相同：12 张三、15 張三'"""
+    return '\n'.join(f"{REASONS[reason]}：" + '、'.join(f"{entry_id} {name}" for entry_id, name in group)
+                     for reason, group in suspects)
@@ -0,0 +1,120 @@
+import os
+import csv
+import json
+from importer import DEFAULT_COLUMNS
+
+# 名单的表头与导入时的默认列名一致，导出的文件可以直接导入或同步回来（包括权重）
+ENTRY_COLUMNS = [DEFAULT_COLUMNS['id'], DEFAULT_COLUMNS['name'], DEFAULT_COLUMNS['weight']]
+WINNER_COLUMNS = ['奖品', '编号', '姓名']
+PROGRESS_EVERY = 5000  # 每写出多少行报告一次进度
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def export_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return 'csv'
+    if ext in ('.jsonl', '.json'):
+        return 'jsonl'
+    return 'xlsx'
+
+
+def winners_path(path):
+    """CSV 导出时中奖名单单独写到 <文件名>_中奖名单.csv"""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_中奖名单{ext}"
+
+
+class Exporter:
+    """
+    流式导出名单和中奖记录：逐行写出，不构建中间 DataFrame。
+    entries 为 (编号, 姓名, 权重) 的可迭代对象（ParticipantStore.rows()），winners 为 (奖品, 编号, 姓名) 的列表，
+    两者都应是调用方准备好的快照，以便在工作线程中安全地迭代。
+    xlsx 写两个工作表“名单”和“中奖名单”；csv 写两个文件；jsonl 每行带 type 字段。
+    entries 为 None 时只导出中奖记录（用于“导出新增中奖名单”）。
+    先写到 <文件名>.part，全部写完才替换目标文件；取消或出错时删除临时文件，不会留下写了一半的导出。
+    """
+
+    def __init__(self, path, entries, winners, total=0):
+        self.path = path
+        self.entries = entries
+        self.winners = winners
+        self.total = total + len(winners)
+        self.written = 0
+        self.parts = []  # [(临时文件, 目标文件)]
+
+    def run(self, progress=None, cancelled=None):
+        self.progress = progress
+        self.cancelled = cancelled
+        fmt = export_format(self.path)
+        try:
+            if fmt == 'csv':
+                self.write_csv()
+            elif fmt == 'jsonl':
+                self.write_jsonl()
+            else:
+                self.write_xlsx()
+        except BaseException:
+            for part, path in self.parts:
+                if os.path.exists(part):
+                    os.remove(part)
+            raise
+        for part, path in self.parts:
+            os.replace(part, path)
+        if progress is not None:
+            progress(self.written, self.total)
+        return self.written
+
+    def part(self, path):
+        part = path + '.part'
+        self.parts.append((part, path))
+        return part
+
+    def rows(self, rows):
+        """逐行转发，同时统计进度并检查是否取消"""
+        for row in rows:
+            yield row
+            self.written += 1
+            if self.written % PROGRESS_EVERY == 0:
+                if self.cancelled is not None and self.cancelled():
+                    raise ExportCancelled()
+                if self.progress is not None:
+                    self.progress(self.written, self.total)
+
+    def write_csv(self):
+        if self.entries is not None:
+            with open(self.part(self.path), 'w', encoding='utf-8-sig', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(ENTRY_COLUMNS)
+                writer.writerows(self.rows(self.entries))
+        path = winners_path(self.path) if self.entries is not None else self.path
+        with open(self.part(path), 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(WINNER_COLUMNS)
+            writer.writerows(self.rows(self.winners))
+
+    def write_jsonl(self):
+        with open(self.part(self.path), 'w', encoding='utf-8') as f:
+            if self.entries is not None:
+                for entry_id, name, weight in self.rows(self.entries):
+                    f.write(json.dumps({'type': 'entry', 'id': entry_id, 'name': name, 'weight': weight}, ensure_ascii=False) + '\n')
+            for prize, entry_id, name in self.rows(self.winners):
+                f.write(json.dumps({'type': 'winner', 'prize': prize, 'id': entry_id, 'name': name}, ensure_ascii=False) + '\n')
+
+    def write_xlsx(self):
+        # openpyxl 只在导出时加载；write_only 模式逐行写出，内存占用与行数无关
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        if self.entries is not None:
+            sheet = workbook.create_sheet('名单')
+            sheet.append(ENTRY_COLUMNS)
+            for row in self.rows(self.entries):
+                sheet.append(row)
+        sheet = workbook.create_sheet('中奖名单')
+        sheet.append(WINNER_COLUMNS)
+        for row in self.rows(self.winners):
+            sheet.append(row)
+        workbook.save(self.part(self.path))
@@ -0,0 +1,180 @@
+"""
+抽奖公平性的蒙特卡洛模拟：按当前名单、权重、奖品和抽奖顺序把整场抽奖重复模拟很多次，
+统计每个人在每个奖项上的中奖频率及其置信区间，用来向各方说明抽奖是公平的。
+
+抽奖规则与界面相同：按调度顺序逐个抽取，每次按权重从剩余的人中抽一人，抽中即移出。
+这样一场抽奖等价于一次“按权重的不放回随机排列”取前 T 个（T 为奖品总数），
+第 k 个被抽中的人得到调度顺序中第 k 次抽取的奖项。按权重的随机排列用指数竞赛生成：
+每人取 Exp(1) / 权重，从小到大排列，与逐个按权重抽取的分布完全相同，可以用 numpy 整批计算。
+"""
+import os
+import csv
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from prize_scheduler import PrizeScheduler, ORDERED
+
+CHUNK_RUNS = 10000  # 每个任务模拟的场数；任务划分与进程数无关，同一种子的结果总是相同
+BATCH_RUNS = 256  # 任务内每批同时模拟的场数，内存约为 BATCH_RUNS * 名单人数 * 16 字节
+Z = 1.959963984540054  # 95% 置信区间
+
+
+def pick_sequence(prizes, schedule=ORDERED):
+    """调度顺序中每一次抽取对应的奖项下标，长度为奖品总数；与界面和命令行使用同一个 PrizeScheduler"""
+    scheduler = PrizeScheduler([dict(prize) for prize in prizes], schedule)
+    sequence = []
+    while scheduler:
+        index, count = scheduler.step()
+        sequence.extend([index] * count)
+        scheduler.record(index, count)
+    return sequence
+
+
+def seed_entropy(seed):
+    """把任意字符串种子转换为 numpy SeedSequence 的熵"""
+    return int.from_bytes(hashlib.sha256(str(seed).encode('utf-8')).digest(), 'big')
+
+
+def simulate_chunk(weights, sequence, tiers, runs, seed):
+    """
+    模拟 runs 场抽奖，返回 tiers * n 的中奖次数（按 奖项 * n + 行 展开的一维数组）。
+    seed 为这个任务独立的 SeedSequence；在子进程中运行，参数和返回值都是可序列化的 numpy 数组。
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    n = len(weights)
+    uniform = n > 0 and bool(np.all(weights == weights[0])) and weights[0] > 0
+    inverse = np.divide(1.0, weights, out=np.full(n, np.inf), where=weights > 0)
+    picks = min(len(sequence), int(np.count_nonzero(weights > 0)))  # 剩余的人权重都为 0 时抽奖停止
+    offsets = np.asarray(sequence[:picks], dtype=np.int64) * n
+    counts = np.zeros(tiers * n, dtype=np.int64)
+    if not picks:
+        return counts
+    buffer = np.empty((min(BATCH_RUNS, runs), n))
+    for start in range(0, runs, BATCH_RUNS):
+        keys = buffer[:min(BATCH_RUNS, runs - start)]
+        # 权重相同时任意独立同分布的键都给出均匀随机排列，均匀分布比指数分布省一次对数运算
+        if uniform:
+            rng.random(out=keys)
+        else:
+            rng.standard_exponential(out=keys)
+            keys *= inverse
+        if picks < n:
+            chosen = np.argpartition(keys, picks - 1, axis=1)[:, :picks]
+        else:
+            chosen = np.broadcast_to(np.arange(n), keys.shape)
+        order = np.argsort(np.take_along_axis(keys, chosen, axis=1), axis=1)
+        winners = np.take_along_axis(chosen, order, axis=1)  # 每场按抽中顺序排列的行号
+        counts += np.bincount((winners + offsets).ravel(), minlength=tiers * n)
+    return counts
+
+
+class FairnessSimulation:
+    """
+    整场抽奖的蒙特卡洛模拟。rows 为 [(编号, 姓名, 权重)]（ParticipantStore.rows() 的结果），
+    prizes 与 prizes.json 格式相同（不会被修改），schedule 为抽奖顺序。
+    run() 用进程池并行模拟，每个任务使用从同一种子派生的独立随机数流；结果保存在 counts 中。
+    名单为空或没有奖品时无从模拟，抛出 ValueError。
+    """
+
+    def __init__(self, rows, prizes, schedule=ORDERED, seed=0):
+        self.rows = list(rows)
+        self.prizes = prizes
+        self.schedule = schedule
+        self.seed = seed
+        self.sequence = pick_sequence(prizes, schedule)
+        if not self.rows:
+            raise ValueError("名单为空，无法模拟")
+        if not self.sequence:
+            raise ValueError("奖品列表为空（或各奖项数量都为 0），无法模拟")
+        self.runs = 0
+        self.counts = None  # numpy 数组 [奖项, 行]
+        self.elapsed = 0
+
+    def run(self, runs, workers=None, progress=None):
+        """模拟 runs 场；workers 为进程数（默认 CPU 核数，1 表示在当前进程中运行），progress(已完成场数, 总场数)"""
+        import numpy as np
+        if runs < 1:
+            raise ValueError(f"模拟场数应为正整数：{runs}")
+        started = time.perf_counter()
+        weights = np.array([row[2] for row in self.rows], dtype=np.float64)
+        tiers = len(self.prizes)
+        chunks = [min(CHUNK_RUNS, runs - start) for start in range(0, runs, CHUNK_RUNS)]
+        seeds = np.random.SeedSequence(seed_entropy(self.seed)).spawn(len(chunks))
+        counts = np.zeros(tiers * len(weights), dtype=np.int64)
+        done = 0
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(chunks) == 1:
+            results = (simulate_chunk(weights, self.sequence, tiers, chunk, seed) for chunk, seed in zip(chunks, seeds))
+            for chunk, result in zip(chunks, results):
+                counts += result
+                done += chunk
+                if progress is not None:
+                    progress(done, runs)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(simulate_chunk, weights, self.sequence, tiers, chunk, seed)
+                           for chunk, seed in zip(chunks, seeds)]
+                for chunk, future in zip(chunks, futures):
+                    counts += future.result()
+                    done += chunk
+                    if progress is not None:
+                        progress(done, runs)
+        self.runs = runs
+        self.counts = counts.reshape(tiers, len(weights))
+        self.elapsed = time.perf_counter() - started
+        return self.counts
+
+    def probabilities(self):
+        """每人在每个奖项上的中奖频率 [奖项, 行]，以及总的中奖频率 [行]"""
+        per_tier = self.counts / self.runs
+        return per_tier, per_tier.sum(axis=0)
+
+    def interval(self, probability):
+        """Wilson 置信区间 (下限, 上限)，对接近 0 的小概率也不会给出负的下限"""
+        import numpy as np
+        n = self.runs
+        center = (probability + Z * Z / (2 * n)) / (1 + Z * Z / n)
+        half = Z * np.sqrt(probability * (1 - probability) / n + Z * Z / (4 * n * n)) / (1 + Z * Z / n)
+        return center - half, center + half
+
+    def write_csv(self, path):
+        """每人一行：编号、姓名、权重，总的中奖概率和各奖项的中奖概率，各带 95% 置信区间"""
+        per_tier, total = self.probabilities()
+        columns = [(total, '中奖')] + [(per_tier[tier], prize['name']) for tier, prize in enumerate(self.prizes)]
+        bounds = [self.interval(values) for values, _ in columns]
+        header = ['编号', '姓名', '权重']
+        for _, name in columns:
+            header += [f"{name}概率", f"{name}下限", f"{name}上限"]
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for row, (entry_id, name, weight) in enumerate(self.rows):
+                line = [entry_id, name, weight]
+                for (values, _), (low, high) in zip(columns, bounds):
+                    line += [f"{values[row]:.6f}", f"{low[row]:.6f}", f"{high[row]:.6f}"]
+                writer.writerow(line)
+
+    def summary(self):
+        """
+        按权重分组汇总：每组的人数、平均中奖概率和最低、最高的个人频率。
+        权重全部相同时每人的理论中奖概率都是 奖品数 / 人数，同时给出置信区间覆盖理论值的人数比例（应接近 95%）。
+        """
+        import numpy as np
+        per_tier, total = self.probabilities()
+        weights = np.array([row[2] for row in self.rows], dtype=np.float64)
+        lines = [f"模拟 {self.runs} 场，名单 {len(self.rows)} 人，奖品 {len(self.sequence)} 份，用时 {self.elapsed:.1f} 秒"]
+        for weight in np.unique(weights):
+            group = weights == weight
+            lines.append(f"权重 {weight:g}：{int(group.sum())} 人，平均中奖概率 {total[group].mean():.4%}，"
+                         f"个人 {total[group].min():.4%} ~ {total[group].max():.4%}")
+        if len(self.rows) and np.all(weights == weights[0]) and weights[0] > 0:
+            n = len(self.rows)
+            sequence = self.sequence[:n]  # 奖品比人多时抽完所有人为止
+            for tier, prize in enumerate(self.prizes):
+                expected = sequence.count(tier) / n
+                low, high = self.interval(per_tier[tier])
+                covered = np.mean((low <= expected) & (expected <= high))
+                lines.append(f"{prize['name']}：理论概率 {expected:.4%}，模拟 {per_tier[tier].min():.4%} ~ "
+                             f"{per_tier[tier].max():.4%}，置信区间覆盖理论值 {covered:.1%}")
+        return '\n'.join(lines)
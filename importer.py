@@ -0,0 +1,315 @@
+import io
+import os
+import csv
+import unicodedata
+from itertools import islice
+from participant_store import ParticipantStore
+from duplicates import find_suspects
+
+CHUNK_SIZE = 5000  # 每次读取和处理的行数
+SUMMARY_LIMIT = 5  # 同步名单的摘要中每类变更最多列出的姓名数
+DEFAULT_COLUMNS = {'id': '编号', 'name': '姓名', 'weight': '权重'}  # 字段 -> 表头名称（也可以是从 0 开始的列号），权重列可选
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """按块读取 xlsx 或 csv，第一块的第一行是表头；返回 (块迭代器, 估计总行数)，csv 的总行数未知，为 0"""
+    if os.path.splitext(path)[1].lower() == '.csv':
+        return CsvChunks(path, chunk_size), 0
+    return read_xlsx_chunks(path, chunk_size)
+
+
+class CsvChunks:
+    """按块读取 csv；不预先数行，用已读的字节数占文件大小的比例估计总行数"""
+
+    def __init__(self, path, chunk_size):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.size = os.path.getsize(path)
+        self.position = 0  # 已读的字节数
+
+    def __iter__(self):
+        with open(self.path, 'rb') as raw, io.TextIOWrapper(raw, encoding='utf-8-sig', newline='') as f:
+            chunk = []
+            for row in csv.reader(f):
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    self.position = raw.tell()
+                    yield chunk
+                    chunk = []
+            self.position = self.size
+            if chunk:
+                yield chunk
+
+    def estimate(self, rows):
+        """已读 rows 行时估计的总行数"""
+        if not self.position:
+            return rows
+        return max(rows, rows * self.size // self.position)
+
+
+def read_xlsx_chunks(path, chunk_size):
+    # openpyxl 只在导入时加载；只读模式逐行流式读取，不会把整个工作簿载入内存
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    sheet = workbook.active
+    total = max((sheet.max_row or 1) - 1, 0)
+
+    def chunks():
+        try:
+            chunk = []
+            for row in sheet.iter_rows(values_only=True):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            workbook.close()
+
+    return chunks(), total
+
+
+def resolve_columns(header, columns):
+    """根据表头找到各字段的列号；姓名列必须存在，其余字段找不到时为 None"""
+    header = [str(cell).strip() if cell is not None else '' for cell in header]
+    indexes = {}
+    for field, column in columns.items():
+        if isinstance(column, int):
+            indexes[field] = column if column < len(header) else None
+        else:
+            indexes[field] = header.index(column) if column in header else None
+    if indexes.get('name') is None:
+        raise ValueError(f"找不到姓名列 '{columns.get('name')}'")
+    return indexes
+
+
+def parse_weight(value):
+    """权重转换为非负数，空值视为 1，无法转换或为负数时抛出 ValueError"""
+    if value is None or value == '':
+        return 1
+    weight = float(value)
+    if not 0 <= weight < float('inf'):
+        raise ValueError(value)
+    return int(weight) if weight.is_integer() else weight
+
+
+def parse_id(value):
+    """编号转换为整数，空值返回 None，无法转换时抛出 ValueError"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(value)
+        return int(value)
+    return int(str(value).strip())
+
+
+def read_renames(path, columns=None):
+    """读取批量改名文件（编号、姓名两列，表头同导入设置），返回 {编号: 新姓名}；编号或姓名无效的行被忽略"""
+    columns = dict(columns or DEFAULT_COLUMNS)
+    chunks, _ = read_chunks(path)
+    names = {}
+    indexes = None
+    for chunk in chunks:
+        if indexes is None:
+            indexes = resolve_columns(chunk[0], columns)
+            if indexes.get('id') is None:
+                raise ValueError(f"找不到编号列 '{columns.get('id')}'")
+            chunk = chunk[1:]
+        id_index, name_index = indexes['id'], indexes['name']
+        for row in chunk:
+            if max(id_index, name_index) >= len(row) or row[name_index] is None:
+                continue
+            name = str(row[name_index]).strip()
+            try:
+                entry_id = parse_id(row[id_index])
+            except ValueError:
+                continue
+            if name and entry_id is not None:
+                names[entry_id] = name
+    return names
+
+
+class RosterImporter:
+    """
+    分块导入名单：逐块校验、去重并写入一个新的 ParticipantStore。
+    可以在工作线程中运行；progress(已处理行数, 估计总行数) 在每块处理完后调用，
+    cancelled() 返回 True 时在块之间中止并抛出 ImportCancelled。
+    check_duplicates 为 True 时导入后再找出疑似重复的人（全半角、空格、繁简不同等），结果见 suspects。
+    """
+
+    def __init__(self, path, columns=None, chunk_size=CHUNK_SIZE, check_duplicates=False):
+        self.path = path
+        self.columns = dict(columns or DEFAULT_COLUMNS)
+        self.chunk_size = chunk_size
+        self.check_duplicates = check_duplicates
+        self.added = 0
+        self.skipped = 0  # 编号或姓名重复
+        self.invalid = 0  # 姓名为空或编号无法识别
+        self.has_weights = False  # 表中是否有权重列，读到表头后确定
+        self.suspects = []  # 疑似重复，格式见 duplicates.find_suspects
+
+    def run(self, store=None, progress=None, cancelled=None):
+        if store is None:
+            store = ParticipantStore()
+        for rows in self.read(progress, cancelled, store.reserve):
+            self.add_rows(store, rows)
+        if self.check_duplicates:
+            self.suspects = find_suspects(store.snapshot(), cancelled)
+            if self.suspects is None:
+                raise ImportCancelled()
+        return store
+
+    def read(self, progress=None, cancelled=None, reserve=None):
+        """逐块读取并校验，每块产出 [(编号或 None, 姓名, 权重)]；已知行数时先调用 reserve(行数)"""
+        chunks, total = read_chunks(self.path, self.chunk_size)
+        if total and reserve is not None:
+            reserve(total)  # 已知行数时先建好哈希表，导入过程中不再重建
+        indexes = None
+        done = 0
+        for chunk in chunks:
+            if cancelled is not None and cancelled():
+                raise ImportCancelled()
+            if indexes is None:
+                indexes = resolve_columns(chunk[0], self.columns)
+                self.has_weights = indexes.get('weight') is not None
+                chunk = chunk[1:]
+            yield self.parse_rows(chunk, indexes)
+            done += len(chunk)
+            if progress is not None:
+                progress(done, chunks.estimate(done) if isinstance(chunks, CsvChunks) else max(total, done))
+
+    def parse_rows(self, rows, indexes):
+        id_index, name_index, weight_index = indexes.get('id'), indexes['name'], indexes.get('weight')
+        parsed = []
+        for row in rows:
+            name = row[name_index] if name_index < len(row) else None
+            name = str(name).strip() if name is not None else ''
+            if not name:
+                self.invalid += 1
+                continue
+            try:
+                entry_id = parse_id(row[id_index]) if id_index is not None and id_index < len(row) else None
+                weight = parse_weight(row[weight_index]) if weight_index is not None and weight_index < len(row) else 1
+            except ValueError:
+                self.invalid += 1
+                continue
+            parsed.append((entry_id, name, weight))
+        return parsed
+
+    def add_rows(self, store, rows):
+        for entry_id, name, weight in rows:
+            if store.add(name, entry_id, weight) is None:
+                self.skipped += 1
+            else:
+                self.added += 1
+
+
+class RosterDiff:
+    """
+    新名单与当前名单的差异：inserts 为要新增的 [(编号或 None, 姓名, 权重)]，
+    renames 为 {编号: 新姓名}，weights 为 {编号: 新权重}，deletes 为表中已没有的编号，
+    unchanged 为不需要修改的人数。
+    """
+
+    def __init__(self):
+        self.inserts = []
+        self.renames = {}
+        self.weights = {}
+        self.deletes = []
+        self.unchanged = 0
+
+    def __bool__(self):
+        return bool(self.inserts or self.renames or self.weights or self.deletes)
+
+    def summary(self, current, limit=SUMMARY_LIMIT):
+        """列出各类变更的人数和前几个姓名，current 为当前名单（用于显示改名前的姓名、原权重和被删除的姓名）"""
+        def sample(names, count):
+            names = '、'.join(names)
+            return f"：{names}{'等' if count > limit else ''}" if count else ''
+
+        lines = [f"新增 {len(self.inserts)} 人" + sample((entry[1] for entry in self.inserts[:limit]), len(self.inserts))]
+        renames = list(islice(self.renames.items(), limit))
+        lines.append(f"改名 {len(self.renames)} 人" + sample((f"{current.get(entry_id)}→{name}" for entry_id, name in renames), len(self.renames)))
+        weights = list(islice(self.weights.items(), limit))
+        lines.append(f"权重变化 {len(self.weights)} 人" + sample((f"{current.get(entry_id)} {current.weight(entry_id)}→{weight}"
+                                                         for entry_id, weight in weights), len(self.weights)))
+        lines.append(f"表中已没有 {len(self.deletes)} 人" + sample((current.get(entry_id) or str(entry_id) for entry_id in self.deletes[:limit]), len(self.deletes)))
+        lines.append(f"未变 {self.unchanged} 人")
+        return '\n'.join(lines)
+
+
+def normalize_name(name):
+    """比较姓名时使用的形式：全角字母数字转为半角（NFKC），连续空白合并为一个空格"""
+    return ' '.join(unicodedata.normalize('NFKC', name).split())
+
+
+class RosterSync(RosterImporter):
+    """
+    把更新后的名单文件（如人事系统导出的表）与当前名单比较，只计算差异，不修改当前名单。
+    有编号的行按编号对应，姓名（规范化后）不同记为改名；没有编号的行按规范化的姓名对应；
+    表中有权重列时，对应上的人权重不同记为修改权重（没有权重列时保留当前的权重）；
+    对应不上的行记为新增，当前名单中没有被任何一行对应到的人记为表中已没有。
+    已中奖的人（winners，[(编号, 姓名)]）已移出名单，表中对应的行跳过，不会重新加入。
+    current 为当前名单的快照 [(编号, 姓名, 权重)]（ParticipantStore.rows()），可以在工作线程中运行，用法同 RosterImporter。
+    """
+
+    def __init__(self, path, current, winners=(), columns=None, chunk_size=CHUNK_SIZE):
+        super().__init__(path, columns, chunk_size)
+        self.current = current
+        self.winners = winners
+        self.won = 0  # 表中已中奖的人数
+
+    def run(self, store=None, progress=None, cancelled=None):
+        names = {}  # 编号 -> 规范化的姓名
+        owners = {}  # 规范化的姓名 -> 编号
+        weights = {}  # 编号 -> 权重（仅非 1 的条目）
+        for entry_id, name, weight in self.current:
+            key = normalize_name(name)
+            names[entry_id] = key
+            owners.setdefault(key, entry_id)
+            if weight != 1:
+                weights[entry_id] = weight
+        won_ids = {entry_id for entry_id, name in self.winners if entry_id not in names}
+        won_names = {normalize_name(name) for entry_id, name in self.winners if entry_id not in names}
+        diff = RosterDiff()
+        matched = set()  # 被表中某一行对应到的当前编号
+        file_ids, file_names = set(), set()
+        for rows in self.read(progress, cancelled):
+            for entry_id, name, weight in rows:
+                key = normalize_name(name)
+                if key in file_names or entry_id in file_ids:
+                    self.skipped += 1  # 表内重复，与导入相同只取第一行
+                    continue
+                file_names.add(key)
+                if entry_id in won_ids or (entry_id is None and key in won_names):
+                    self.won += 1
+                    continue
+                if entry_id is not None:
+                    file_ids.add(entry_id)
+                    if entry_id in names:
+                        matched.add(entry_id)
+                        renamed = names[entry_id] != key
+                        if renamed:
+                            diff.renames[entry_id] = name
+                        if self.has_weights and weights.get(entry_id, 1) != weight:
+                            diff.weights[entry_id] = weight
+                        elif not renamed:
+                            diff.unchanged += 1
+                        continue
+                elif key in owners and owners[key] not in matched:
+                    owner = owners[key]
+                    matched.add(owner)
+                    if self.has_weights and weights.get(owner, 1) != weight:
+                        diff.weights[owner] = weight
+                    else:
+                        diff.unchanged += 1
+                    continue
+                diff.inserts.append((entry_id, name, weight))
+        diff.deletes = [entry_id for entry_id in names if entry_id not in matched]
+        return diff
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import uuid
+import threading
+
+COMPACT_THRESHOLD = 10000  # 日志记录数超过该值时应做一次快照并清空日志
+
+
+class Journal:
+    """
+    追加写日志：每次抽奖、添加、删除、改名、修改权重和奖品修改各写一行 JSON。
+    每条记录写入后立即 flush 到操作系统（程序崩溃不丢数据），
+    fsync 则按 sync_interval 合并，避免每次操作都等待磁盘；一批写入之后最迟 sync_interval 秒由定时器补上 fsync。
+    启动时在快照（data.db）之上重放日志，快照保存后清空日志。
+    每份日志的第一行记有随机的标识（见 token），快照记下它已包含的日志，清空前中断时不会重复重放。
+    奖品修改由 DataManager 的后台线程合并后写入，因此写入操作都加锁。
+    """
+
+    def __init__(self, path, sync_interval=0.5):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.file = None
+        self.records = 0
+        self.last_sync = time.monotonic()
+        self.timer = None  # 等待补上 fsync 的定时器
+        self.lock = threading.RLock()
+
+    def open(self):
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+            if self.file.tell() == 0:
+                self.file.write(header())
+        return self.file
+
+    def token(self):
+        """这份日志的标识；日志不存在或为空时返回 None，旧版本写的日志没有标识行，返回空字符串"""
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    line = f.readline()
+            except FileNotFoundError:
+                return None
+            if not line:
+                return None
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return ''
+            return record.get('token', '') if record.get('op') == 'journal' else ''
+
+    def append(self, op, **fields):
+        """追加一条记录"""
+        self.append_many([dict(op=op, **fields)])
+
+    def append_many(self, records):
+        """一次写入多条记录（如批量抽奖、批量删除），只 flush 一次"""
+        with self.lock:
+            f = self.open()
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+                self.records += 1
+            f.flush()
+            elapsed = time.monotonic() - self.last_sync
+            if elapsed >= self.sync_interval:
+                self.sync()
+            elif self.timer is None:
+                # 这批之后可能不再有写入，定时补上 fsync，最后几条记录不会一直停留在缓存中
+                self.timer = threading.Timer(self.sync_interval - elapsed, self.sync)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def sync(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            self.last_sync = time.monotonic()
+
+    def needs_compaction(self):
+        return self.records >= COMPACT_THRESHOLD
+
+    def read(self):
+        """按顺序读出所有记录；最后一行若因崩溃只写了一半则忽略"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def replay(self, store, prizes, winners=None):
+        """把日志应用到名单、奖品列表和中奖记录上，返回记录数"""
+        count = 0
+        for record in self.read():
+            if record.get('op') == 'journal':
+                continue
+            apply_record(record, store, prizes, winners)
+            count += 1
+        self.records = count
+        return count
+
+    def reset(self):
+        """快照已保存，换成只有新标识行的空日志；先写临时文件再改名，中断时旧日志保持完整"""
+        with self.lock:
+            self.close()
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(header())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            self.records = 0
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.sync()
+                self.file.close()
+                self.file = None
+
+
+def header():
+    return json.dumps({'op': 'journal', 'token': uuid.uuid4().hex}) + '\n'
+
+
+def apply_record(record, store, prizes, winners=None):
+    """应用单条日志记录（标识行等未知的记录忽略）；所有操作都是幂等的"""
+    op = record.get('op')
+    if op == 'add':
+        store.add(record['name'], record['id'], record.get('weight', 1))
+    elif op == 'delete':
+        if 'ids' in record:
+            store.remove_many(record['ids'])
+        else:
+            store.remove(record['id'])
+    elif op == 'rename':
+        if 'names' in record:
+            store.rename_many(dict(record['names']))
+        elif record['id'] in store:
+            store.rename(record['id'], record['name'])
+    elif op == 'weight':
+        store.set_weights(dict(record['weights']))
+    elif op == 'renumber':
+        # 只在名单还是重新编号前的状态时生效；快照已包含这次重新编号时跳过
+        if store.fingerprint() == record['before']:
+            store.renumber(record['start'])
+    elif op == 'draw':
+        # 只有条目确实还在名单中时才扣减奖品数量并记为中奖
+        entry = store.remove(record['id'])
+        if entry is None:
+            return
+        prize = record.get('prize')
+        if prize is not None and prize < len(prizes):
+            prizes[prize]['count'] = max(prizes[prize]['count'] - 1, 0)
+        if winners is not None:
+            winners.append((prizes[prize]['name'] if prize is not None and prize < len(prizes) else None, entry[0], entry[1]))
+    elif op == 'prizes':
+        prizes[:] = record['prizes']
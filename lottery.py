@@ -0,0 +1,209 @@
+"""
+命令行抽奖，不依赖 PyQt5，可在无显示器的服务器上批量运行。
+
+    python -m lottery draw --roster 名单.xlsx --prizes prizes.json --seed 42 --out winners.csv
+    python -m lottery verify 日志.draws
+    python -m lottery check --roster 名单.xlsx
+    python -m lottery simulate --roster 名单.xlsx --prizes prizes.json --runs 1000000 --out 公平性.csv
+    python -m lottery serve --port 8765
+"""
+import os
+import sys
+import json
+import secrets
+import asyncio
+import argparse
+from participant_store import ParticipantStore
+from data_management import SqliteBackend, DataManager, get_draws_dir
+from importer import RosterImporter
+from duplicates import find_suspects, describe
+from draw_session import DrawSession, build_engine, verify_log
+from exporter import Exporter
+from prize_scheduler import PrizeScheduler, SCHEDULES, ORDERED
+
+
+def load_roster(path, columns=None):
+    """读取名单：.db 为程序自己的名单文件，其余（xlsx/csv）走导入流程"""
+    if os.path.splitext(path)[1].lower() == '.db':
+        store = ParticipantStore()
+        SqliteBackend(path).load(store)
+        return store
+    return RosterImporter(path, columns).run()
+
+
+def positive_int(value):
+    """命令行参数：正整数"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"应为正整数：{value}")
+    return number
+
+
+def load_prizes(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_draw(store, prizes, seed, log_dir=None, schedule=ORDERED):
+    """
+    按调度顺序抽完所有奖项，规则与界面相同：抽中即移出名单，每人最多中一次。
+    返回 [(奖品, 编号, 姓名), ...]。同一名单、种子和抽奖顺序的结果与界面第一段抽奖一致。
+    prizes 不会被修改。
+    """
+    if log_dir:
+        session = DrawSession(store, seed, log_dir)
+        draw_many = session.draw_many
+    else:
+        session = None
+        engine = build_engine(store, str(seed), 0)
+        draw_many = lambda k, prize: engine.draw_many(k)
+    scheduler = PrizeScheduler([dict(prize) for prize in prizes], schedule)
+    winners = []
+    try:
+        while scheduler:
+            index, count = scheduler.step()
+            drawn = draw_many(count, index)
+            if not drawn:
+                break
+            winners.extend((prizes[index]['name'], entry[0], entry[1]) for entry in drawn)
+            scheduler.record(index, len(drawn))
+    finally:
+        if session is not None:
+            session.close()
+    return winners
+
+
+def draw_command(args):
+    seed = args.seed if args.seed is not None else secrets.token_hex(8)
+    store = load_roster(args.roster)
+    prizes = load_prizes(args.prizes)
+    winners = run_draw(store, prizes, seed, args.log_dir, args.schedule)
+    Exporter(args.out, None, winners).run()
+    print(f"名单 {len(store)} 人，抽出 {len(winners)} 人，种子 {seed}，结果已写入 {args.out}")
+    return 0
+
+
+def verify_command(args):
+    failed = 0
+    for path in args.logs:
+        ok, checked, message = verify_log(path, args.roster)
+        print(f"{path}: {'通过' if ok else '失败'}，核对 {checked} 次抽取，{message}")
+        failed += not ok
+    return 1 if failed else 0
+
+
+def check_command(args):
+    """检查名单中疑似重复的人（全半角、空格、繁简不同或拼写相近），有疑似重复时返回 1"""
+    store = load_roster(args.roster)
+    suspects = find_suspects(store.snapshot())
+    if suspects:
+        print(describe(suspects))
+    print(f"名单 {len(store)} 人，疑似重复 {len(suspects)} 组")
+    return 1 if suspects else 0
+
+
+def simulate_command(args):
+    """重复模拟整场抽奖，输出每人在各奖项上的中奖概率和置信区间"""
+    from fairness import FairnessSimulation, CHUNK_RUNS
+    store = load_roster(args.roster)
+    prizes = load_prizes(args.prizes)
+    seed = args.seed if args.seed is not None else secrets.token_hex(8)
+    try:
+        simulation = FairnessSimulation(store.rows(), prizes, args.schedule, seed)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    step = max(args.runs // 10, 1)
+
+    def progress(done, total):
+        if done % step < CHUNK_RUNS or done == total:
+            print(f"已模拟 {done}/{total} 场", file=sys.stderr)
+
+    simulation.run(args.runs, args.workers, progress)
+    simulation.write_csv(args.out)
+    print(simulation.summary())
+    print(f"种子 {seed}，每人的中奖概率已写入 {args.out}")
+    return 0
+
+
+def serve_command(args):
+    """以本地服务方式运行：使用与界面相同的数据目录，所有操作写入日志，退出时保存快照"""
+    from draw_service import DrawService
+    data_manager = DataManager()
+    settings = data_manager.load_settings()
+    store, prizes, winners = data_manager.load(data_manager.load_prizes())
+    seed = args.seed or settings.get('draw_seed') or secrets.token_hex(8)
+    schedule = args.schedule or settings.get('prize_schedule', ORDERED)
+    service = DrawService(store, prizes, winners, seed, data_manager, get_draws_dir(), args.interval / 1000, schedule)
+    service.segment = settings.get('draw_segment', 0)
+
+    async def serve():
+        port = await service.start(args.host, args.port)
+        print(f"名单 {len(store)} 人，种子 {seed}，服务地址 http://{args.host}:{port}/（显示端连接 /ws）")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await service.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        data_manager.checkpoint(store, prizes, winners)
+        settings.pop('prizes', None)  # 奖品只保存在 prizes.json
+        settings.update(draw_seed=seed, draw_segment=service.segment)
+        data_manager.save_settings(settings)
+        data_manager.close()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='lottery', description='编号与姓名抽奖（命令行）')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    draw = commands.add_parser('draw', help='按奖品列表一次抽完')
+    draw.add_argument('--roster', required=True, help='名单文件（xlsx、csv 或 data.db）')
+    draw.add_argument('--prizes', required=True, help='奖品 JSON，格式与 prizes.json 相同')
+    draw.add_argument('--seed', help='抽奖种子，不指定时随机生成并打印')
+    draw.add_argument('--out', required=True, help='中奖结果文件（csv、jsonl 或 xlsx）')
+    draw.add_argument('--log-dir', help='写入可校验的抽奖日志和名单快照的目录')
+    draw.add_argument('--schedule', choices=list(SCHEDULES), default=ORDERED, help='奖项的抽奖顺序')
+    draw.set_defaults(func=draw_command)
+
+    verify = commands.add_parser('verify', help='重放抽奖日志并核对结果')
+    verify.add_argument('logs', nargs='+', help='抽奖日志（.draws）')
+    verify.add_argument('--roster', help='名单快照，默认使用日志头中记录的文件')
+    verify.set_defaults(func=verify_command)
+
+    check = commands.add_parser('check', help='检查名单中疑似重复的人')
+    check.add_argument('--roster', required=True, help='名单文件（xlsx、csv 或 data.db）')
+    check.set_defaults(func=check_command)
+
+    simulate = commands.add_parser('simulate', help='模拟整场抽奖，统计每人在各奖项上的中奖概率')
+    simulate.add_argument('--roster', required=True, help='名单文件（xlsx、csv 或 data.db）')
+    simulate.add_argument('--prizes', required=True, help='奖品 JSON，格式与 prizes.json 相同')
+    simulate.add_argument('--runs', type=positive_int, default=100000, help='模拟的场数')
+    simulate.add_argument('--workers', type=positive_int, help='进程数，默认使用全部 CPU 核')
+    simulate.add_argument('--seed', help='模拟的随机数种子，同一种子的结果相同')
+    simulate.add_argument('--schedule', choices=list(SCHEDULES), default=ORDERED, help='奖项的抽奖顺序')
+    simulate.add_argument('--out', required=True, help='结果文件（csv）')
+    simulate.set_defaults(func=simulate_command)
+
+    serve = commands.add_parser('serve', help='运行本地抽奖服务，供多个显示屏共享同一场活动')
+    serve.add_argument('--host', default='127.0.0.1', help='监听地址，默认只允许本机访问')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--seed', help='抽奖种子，默认使用界面设置中的种子')
+    serve.add_argument('--schedule', choices=list(SCHEDULES), help='奖项的抽奖顺序，默认使用界面设置')
+    serve.add_argument('--interval', type=int, default=100, help='滚动帧间隔（毫秒）')
+    serve.set_defaults(func=serve_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
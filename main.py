@@ -1,24 +1,43 @@
 import sys
 import os
-import pandas as pd
-from PyQt5.QtWidgets import QApplication, QWidget, QInputDialog, QMessageBox, QFileDialog, QVBoxLayout, QPushButton, QListView
-from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex
-from ui_components import setup_main_ui, CustomLineEdit
-from data_management import DataManager
-from rolling_window import RollingWindow
-from prize_management_window import PrizeManagementWindow
-import random
-
-class EntryModel(QAbstractItemModel):
+from bisect import bisect_left
+from PyQt5.QtWidgets import QApplication, QWidget, QInputDialog, QMessageBox, QFileDialog, QVBoxLayout, QPushButton, QProgressDialog
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
+from ui_components import setup_main_ui, CustomLineEdit, SEARCH_PLACEHOLDER
+from data_management import DataManager, get_draws_dir, get_app_dir
+from draw_session import DrawSession
+from participant_store import ParticipantStore
+from importer import RosterImporter, RosterSync, DEFAULT_COLUMNS, read_renames
+from duplicates import describe
+from prize_scheduler import SCHEDULES, ORDERED
+from exporter import Exporter
+from search_index import build_index
+from worker import Worker
+import secrets
+import profiler
+
+FETCH_BATCH = 1000  # 视图滚动到底部时每次追加加载的行数
+COMPACT_CHECK_INTERVAL = 60000  # 每分钟检查一次日志是否需要压缩为快照（毫秒）
+
+class EntryModel(QAbstractTableModel):
+    """
+    名单模型：直接读取 ParticipantStore，不复制数据。
+    行按需分批加载（canFetchMore/fetchMore），增删改只通知受影响的行，并同步更新搜索索引。
+    """
+    changed = pyqtSignal()  # 增删改之后发出，筛选视图据此重新查询
+
     def __init__(self, entries, parent=None):
         super().__init__(parent)
         self.entries = entries
+        self.loaded = min(len(entries), FETCH_BATCH)
+        self.search_index = None
+        self.index_backlog = None  # 索引在后台建立期间的修改 [(操作, 参数)]
 
     def rowCount(self, parent=QModelIndex()):
-        return len(self.entries)
+        return 0 if parent.isValid() else self.loaded
 
     def columnCount(self, parent=QModelIndex()):
-        return 2
+        return 0 if parent.isValid() else 2
 
     def data(self, index, role=Qt.DisplayRole):
         if role == Qt.DisplayRole:
@@ -35,31 +54,232 @@ class EntryModel(QAbstractItemModel):
                 return ['编号', '姓名'][section]
         return None
 
-    def index(self, row, column, parent=QModelIndex()):
-        return self.createIndex(row, column)
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < len(self.entries)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(FETCH_BATCH, len(self.entries) - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def entry_id(self, row):
+        return self.entries.id_at(row)
+
+    def start_index(self):
+        """后台开始为当前名单建立索引，之后的修改先记下"""
+        self.search_index = None
+        self.index_backlog = []
+
+    def attach_index(self, search_index):
+        """索引建好后补上建立期间的修改"""
+        for op, args in self.index_backlog or ():
+            getattr(search_index, op)(*args)
+        self.search_index = search_index
+        self.index_backlog = None
+
+    def update_index(self, op, *args):
+        if self.search_index is not None:
+            getattr(self.search_index, op)(*args)
+        elif self.index_backlog is not None:
+            self.index_backlog.append((op, args))
+
+    def refresh(self):
+        """名单被整体替换（加载、导入）后重置视图"""
+        self.beginResetModel()
+        self.loaded = min(len(self.entries), FETCH_BATCH)
+        self.endResetModel()
+
+    def add(self, name):
+        """添加条目并返回编号，姓名重复时返回 None"""
+        if self.entries.find(name) is not None:
+            return None
+        if self.loaded < len(self.entries):
+            # 末尾尚未加载，新行会在滚动到底部时一起加载
+            entry_id = self.entries.add(name)
+        else:
+            self.beginInsertRows(QModelIndex(), self.loaded, self.loaded)
+            entry_id = self.entries.add(name)
+            self.loaded += 1
+            self.endInsertRows()
+        self.update_index('add', entry_id, name)
+        self.changed.emit()
+        return entry_id
+
+    def add_many(self, entries):
+        """批量添加 [(编号或 None, 姓名, 权重)]，返回实际添加的 [(编号, 姓名, 权重)]；编号或姓名重复的跳过"""
+        at_end = self.loaded >= len(self.entries)
+        self.entries.reserve(len(entries))
+        added = []
+        for entry_id, name, weight in entries:
+            entry_id = self.entries.add(name, entry_id, weight)
+            if entry_id is not None:
+                added.append((entry_id, name, weight))
+        if added:
+            if at_end:
+                # 新行此前不在视图中，与 fetchMore 一样一次通知
+                self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + len(added) - 1)
+                self.loaded += len(added)
+                self.endInsertRows()
+            for entry_id, name, weight in added:
+                self.update_index('add', entry_id, name)
+            self.changed.emit()
+        return added
+
+    def rename(self, entry_id, new_name):
+        """修改姓名，只刷新这一格"""
+        if not self.entries.rename(entry_id, new_name):
+            return False
+        row = self.entries.row_of(entry_id)
+        if row < self.loaded:
+            cell = self.index(row, 1)
+            self.dataChanged.emit(cell, cell, [Qt.DisplayRole])
+        self.update_index('rename', entry_id, new_name)
+        self.changed.emit()
+        return True
+
+    def remove(self, entry_ids):
+        """
+        删除一组条目，返回被删除的条目（按行顺序）。名单只压缩一次；
+        被删除的行连成一段时只通知这一段，否则整体重置一次视图，不逐段发出 rowsRemoved。
+        """
+        rows = self.entries.rows_of(entry_ids)
+        if not rows:
+            return []
+        low, high = rows[0], rows[-1]
+        if high - low + 1 == len(rows):
+            visible_high = min(high, self.loaded - 1)
+            if low <= visible_high:
+                self.beginRemoveRows(QModelIndex(), low, visible_high)
+            removed = self.entries.remove_rows(rows)
+            if low <= visible_high:
+                self.loaded -= visible_high - low + 1
+                self.endRemoveRows()
+        else:
+            self.beginResetModel()
+            removed = self.entries.remove_rows(rows)
+            # 保留已加载的行数，视图不必从头重新分批加载
+            loaded = self.loaded - bisect_left(rows, self.loaded)
+            self.loaded = min(max(loaded, FETCH_BATCH), len(self.entries))
+            self.endResetModel()
+        for entry in removed:
+            self.update_index('remove', entry[0])
+        self.changed.emit()
+        return removed
+
+    def rename_many(self, names):
+        """按 {编号: 新姓名} 批量改名，返回实际修改的部分；只通知一次姓名列的变化"""
+        renamed = self.entries.rename_many(names)
+        if renamed:
+            if self.loaded:
+                self.dataChanged.emit(self.index(0, 1), self.index(self.loaded - 1, 1), [Qt.DisplayRole])
+            for entry_id, name in renamed.items():
+                self.update_index('rename', entry_id, name)
+            self.changed.emit()
+        return renamed
+
+    def renumber(self, start=1):
+        """按当前顺序重新编号，返回 {旧编号: 新编号}；只通知一次编号列的变化"""
+        mapping = self.entries.renumber(start)
+        if self.loaded:
+            self.dataChanged.emit(self.index(0, 0), self.index(self.loaded - 1, 0), [Qt.DisplayRole])
+        self.update_index('renumber', mapping)
+        self.changed.emit()
+        return mapping
+
+
+class EntryFilterModel(QAbstractTableModel):
+    """
+    名单的筛选视图（代理模型）：只保存搜索索引返回的编号，姓名仍从 ParticipantStore 读取。
+    结果同样按需分批加载；名单修改后重新执行当前查询。
+    """
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.query = ''
+        self.ids = []
+        self.loaded = 0
+        source.changed.connect(self.refresh)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
 
-    def parent(self, index):
-        return QModelIndex()
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            entry_id = self.ids[index.row()]
+            if index.column() == 0:
+                return str(entry_id)
+            elif index.column() == 1:
+                return self.source.entries.get(entry_id)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return ['编号', '姓名'][section]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < len(self.ids)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(FETCH_BATCH, len(self.ids) - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def entry_id(self, row):
+        return self.ids[row]
+
+    def set_query(self, query):
+        self.query = query
+        self.refresh()
+
+    def refresh(self):
+        self.beginResetModel()
+        search_index = self.source.search_index
+        self.ids = search_index.search(self.query) if search_index is not None and self.query else []
+        self.loaded = min(len(self.ids), FETCH_BATCH)
+        self.endResetModel()
 
 class RandomNumberRolling(QWidget):
     def __init__(self):
         super().__init__()
-        self.entries = []
-        self.current_id = 1
+        self.entries = ParticipantStore()
         self.last_selected = None
         self.is_rolling = False
         self.is_fullscreen = False
-        self.current_page = 0
-        self.entries_per_page = 10
-        self.total_pages = 1
         self.window_size = (800, 1000)
         self.prizes = []
+        self.winners = []  # 中奖记录 (奖品, 编号, 姓名)，按抽取顺序
+        self.exported_winners = 0  # 上次导出时已导出的中奖记录数
+        self.rolling_interval = 100  # 滚动刷新间隔（毫秒）
+        self.import_columns = dict(DEFAULT_COLUMNS)
+        self.draw_session = None  # 当前这一段可复现的抽奖，名单修改后结束
+        self.draw_seed = None  # 活动前公布的抽奖种子
+        self.draw_segment = 0
+        self.prize_schedule = ORDERED  # 奖项的抽奖顺序，见 prize_scheduler.SCHEDULES
         self.data_manager = DataManager()
+        self.load_worker = None  # 启动时后台读取名单，完成前界面不可操作
+        self.index_worker = None  # 加载或导入后在后台建立搜索索引
+        self.import_worker = None
+        self.export_worker = None
 
         self.load_settings()
         self.initUI()
-        self.load_data()
         self.load_prizes()
+        self.load_data()
+
+        self.compact_timer = QTimer(self)
+        self.compact_timer.timeout.connect(self.compact_journal)
+        self.compact_timer.start(COMPACT_CHECK_INTERVAL)
 
     def initUI(self):
         self.setWindowTitle("编号与姓名滚动抽奖")
@@ -68,7 +288,7 @@ class RandomNumberRolling(QWidget):
         self.resize(*self.window_size)
 
         self.model = EntryModel(self.entries, self)
-        self.listbox = QListView(self)
+        self.filter_model = EntryFilterModel(self.model, self)
         self.listbox.setModel(self.model)
 
         # 添加奖品管理按钮
@@ -87,28 +307,69 @@ class RandomNumberRolling(QWidget):
         super().keyPressEvent(event)
 
     def load_data(self):
-        self.entries = self.data_manager.load_data()
-        if self.entries:
-            self.current_id = max(entry[0] for entry in self.entries) + 1
-        self.update_listbox()
+        """在后台读取名单并重放日志，窗口先显示出来，读取完成前禁用操作"""
+        self.setEnabled(False)
+        self.count_label.setText("正在加载名单…")
+        # 奖品用副本重放，完成后由界面线程一次性替换
+        prizes = [dict(prize) for prize in self.prizes]
+        self.load_worker = Worker(lambda progress, cancelled: self.data_manager.load(prizes), self)
+        self.load_worker.succeeded.connect(self.finish_loading)
+        self.load_worker.failed.connect(self.loading_failed)
+        self.load_worker.start()
+
+    def finish_loading(self, result):
+        store, prizes, winners = result
+        self.entries.take(store)
+        self.prizes[:] = prizes
+        self.winners[:] = winners
+        self.load_worker = None
+        self.model.refresh()
+        self.build_search_index()
+        self.update_count()
+        self.setEnabled(True)
+
+    def loading_failed(self, message):
+        self.load_worker = None
+        self.build_search_index()
+        self.update_count()
+        self.setEnabled(True)
+        QMessageBox.critical(self, "加载错误", f"读取名单时发生错误: {message}")
 
     def save_data(self):
+        """保存完整快照并清空日志"""
+        if self.load_worker is not None:
+            # 名单还没读完时退出：等后台线程结束，界面上没有可保存的修改
+            self.load_worker.wait()
+            return
+        self.apply_draw_results()
         if self.entries:
-            self.data_manager.save_data(self.entries)
+            self.data_manager.checkpoint(self.entries, self.prizes, self.winners)
+
+    def compact_journal(self):
+        if self.data_manager.journal.needs_compaction():
+            self.save_data()
 
     def load_settings(self):
         settings = self.data_manager.load_settings()
-        self.entries_per_page = settings.get('entries_per_page', 10)
-        self.current_page = settings.get('current_page', 0)
         self.window_size = tuple(settings.get('window_size', (800, 1000)))
-        self.prizes = settings.get('prizes', [])
+        self.import_columns = dict(DEFAULT_COLUMNS, **settings.get('import_columns', {}))
+        self.exported_winners = settings.get('exported_winners', 0)
+        self.rolling_interval = settings.get('rolling_interval', 100)
+        self.draw_seed = settings.get('draw_seed') or secrets.token_hex(8)
+        self.draw_segment = settings.get('draw_segment', 0)
+        self.prize_schedule = settings.get('prize_schedule', ORDERED)
+        if self.prize_schedule not in SCHEDULES:
+            self.prize_schedule = ORDERED
 
     def save_settings(self):
         settings = {
-            'entries_per_page': self.entries_per_page,
-            'current_page': self.current_page,
             'window_size': (self.width(), self.height()),
-            'prizes': self.prizes
+            'import_columns': dict(self.import_columns),
+            'exported_winners': self.exported_winners,
+            'rolling_interval': self.rolling_interval,
+            'draw_seed': self.draw_seed,
+            'draw_segment': self.draw_segment,
+            'prize_schedule': self.prize_schedule,
         }
         self.data_manager.save_settings(settings)
 
@@ -121,10 +382,11 @@ class RandomNumberRolling(QWidget):
     def add_entry(self):
         name = self.name_entry.text().strip()
         if name:
-            if not any(entry[1] == name for entry in self.entries):
-                self.entries.append((self.current_id, name))
-                self.current_id += 1
-                self.update_listbox()
+            entry_id = self.model.add(name)
+            if entry_id is not None:
+                self.end_draw_session()
+                self.data_manager.record('add', id=entry_id, name=name)
+                self.update_count()
                 self.name_entry.clear()
                 QMessageBox.information(self, "添加条目", f"成功添加条目: {name}")
             else:
@@ -133,52 +395,127 @@ class RandomNumberRolling(QWidget):
             QMessageBox.warning(self, "添加条目", "请输入姓名！")
 
     def delete_entry(self):
-        if self.listbox.selectedItems():
-            for item in reversed(self.listbox.selectedItems()):
-                self.entries.pop(self.listbox.row(item))
-            self.update_listbox()
+        # 先取出选中的编号：结束抽奖段会移除中奖条目，筛选视图随之重新查询
+        view_model = self.listbox.model()
+        selected_ids = [view_model.entry_id(index.row()) for index in self.listbox.selectionModel().selectedRows()]
+        if selected_ids:
+            self.remove_entries(selected_ids)
             QMessageBox.information(self, "删除条目", "选中条目已删除。")
         else:
             QMessageBox.warning(self, "删除条目", "请先选择要删除的条目。")
 
+    def remove_entries(self, entry_ids):
+        """批量删除：名单、视图和搜索索引各更新一次，日志只写一条记录"""
+        self.end_draw_session()
+        removed = self.model.remove(entry_ids)
+        if removed:
+            self.data_manager.record('delete', ids=[entry[0] for entry in removed])
+        self.update_count()
+        return removed
+
+    def delete_filtered(self):
+        """删除搜索框筛选出的全部条目，如活动前删除未到场的人"""
+        entry_ids = list(self.filter_model.ids) if self.listbox.model() is self.filter_model else []
+        if not entry_ids:
+            QMessageBox.warning(self, "删除筛选结果", "请先在搜索框中筛选出要删除的条目。")
+            return
+        if QMessageBox.question(self, "删除筛选结果", f"确定删除筛选出的 {len(entry_ids)} 人吗？") == QMessageBox.Yes:
+            removed = self.remove_entries(entry_ids)
+            QMessageBox.information(self, "删除筛选结果", f"已删除 {len(removed)} 人。")
+
+    def rename_from_file(self):
+        """按文件中的编号和姓名列批量改名（表头与导入设置相同）"""
+        fname = QFileDialog.getOpenFileName(self, '批量改名', os.getcwd(), "名单文件 (*.xlsx *.csv)")
+        if fname[0]:
+            try:
+                names = read_renames(fname[0], self.import_columns)
+            except Exception as e:
+                QMessageBox.critical(self, "批量改名", f"读取文件时发生错误: {e}")
+                return
+            self.end_draw_session()
+            renamed = self.model.rename_many(names)
+            if renamed:
+                self.data_manager.record('rename', names=list(renamed.items()))
+            self.update_count()
+            QMessageBox.information(self, "批量改名", f"已修改 {len(renamed)} 人，跳过 {len(names) - len(renamed)} 人（编号不存在、姓名未变或重名）。")
+
+    def renumber_entries(self):
+        """按当前顺序把编号重新编为 1 到 n；已有的中奖记录保留原编号"""
+        if not self.entries:
+            return
+        if QMessageBox.question(self, "重新编号", f"确定按当前顺序把 {len(self.entries)} 人重新编号为 1 到 {len(self.entries)} 吗？\n已有的中奖记录保留原编号。") == QMessageBox.Yes:
+            self.end_draw_session()
+            before = self.entries.fingerprint()
+            self.model.renumber(1)
+            self.data_manager.record('renumber', start=1, before=before)
+            # 日志中更早的记录用的是旧编号，重放到重新编号后的快照上会改错人；立即保存快照并清空日志
+            self.save_data()
+
     def modify_entry(self):
-        if self.listbox.selectedItems():
-            current_item = self.listbox.selectedItems()[0]
-            row = self.listbox.row(current_item)
-            current_name = self.entries[row][1]
+        selected_rows = self.listbox.selectionModel().selectedRows()
+        if selected_rows:
+            entry_id = self.listbox.model().entry_id(selected_rows[0].row())
+            current_name = self.entries.get(entry_id)
             new_name, ok = QInputDialog.getText(self, "修改姓名", "请输入新的姓名：", text=current_name)
             if ok and new_name:
-                self.entries[row] = (self.entries[row][0], new_name)
-                self.update_listbox()
-
-    def update_listbox(self):
-        self.listbox.clear()
-        start, end = self.current_page * self.entries_per_page, (self.current_page + 1) * self.entries_per_page
-        for entry in self.entries[start:min(end, len(self.entries))]:
-            self.listbox.addItem(f"{entry[0]} {entry[1]}")
-        self.total_pages = (len(self.entries) + self.entries_per_page - 1) // self.entries_per_page
-        self.page_label.setText(f"当前页: {self.current_page + 1} / {self.total_pages}")
-
-    def prev_page(self):
-        if self.current_page > 0:
-            self.current_page -= 1
-            self.update_listbox()
-
-    def next_page(self):
-        if (self.current_page + 1) * self.entries_per_page < len(self.entries):
-            self.current_page += 1
-            self.update_listbox()
-
-    def update_entries_per_page(self):
-        try:
-            new_entries = int(self.entries_per_page_entry.text())
-            if new_entries > 0:
-                self.entries_per_page = new_entries
-                self.current_page = 0
-                self.update_listbox()
-                self.save_settings()
-        except ValueError:
-            pass
+                if self.model.rename(entry_id, new_name):
+                    self.end_draw_session()
+                    self.data_manager.record('rename', id=entry_id, name=new_name)
+                    self.update_count()  # 筛选时改名后可能不再匹配
+                else:
+                    QMessageBox.warning(self, "修改姓名", f"条目 '{new_name}' 已存在！")
+
+    def update_count(self):
+        if self.listbox.model() is self.filter_model:
+            self.count_label.setText(f"共 {len(self.entries)} 人，找到 {len(self.filter_model.ids)} 人")
+        else:
+            self.count_label.setText(f"共 {len(self.entries)} 人")
+
+    def filter_entries(self, text):
+        """搜索框内容变化时筛选名单，清空时恢复完整名单"""
+        if text.strip():
+            self.filter_model.set_query(text)
+            if self.listbox.model() is not self.filter_model:
+                self.listbox.setModel(self.filter_model)
+        elif self.listbox.model() is not self.model:
+            self.filter_model.set_query('')
+            self.listbox.setModel(self.model)
+        self.update_count()
+
+    def build_search_index(self):
+        """在后台为当前名单建立搜索索引，建好之前搜索框不可用"""
+        self.cancel_search_index()
+        self.model.start_index()
+        self.search_entry.setEnabled(False)
+        self.search_entry.setPlaceholderText("正在建立搜索索引…")
+        snapshot = self.entries.snapshot()
+        self.index_worker = Worker(lambda progress, cancelled: build_index(snapshot, progress, cancelled), self)
+        self.index_worker.succeeded.connect(self.finish_search_index)
+        self.index_worker.start()
+
+    def finish_search_index(self, search_index):
+        if self.sender() is not self.index_worker:
+            return  # 已被更新的名单取代
+        self.index_worker = None
+        self.model.attach_index(search_index)
+        self.search_entry.setEnabled(True)
+        self.search_entry.setPlaceholderText(SEARCH_PLACEHOLDER)
+        self.filter_model.refresh()
+        self.update_count()
+
+    def cancel_search_index(self):
+        if self.index_worker is not None:
+            self.index_worker.cancel()
+            self.index_worker.wait()
+            self.index_worker = None
+
+    def stop_workers(self):
+        """退出前取消后台的导入、导出和建索引并等待线程结束；取消的导出只删掉临时文件，原文件不受影响"""
+        self.cancel_search_index()
+        for worker in (self.import_worker, self.export_worker):
+            if worker is not None:
+                worker.cancel()
+                worker.wait()
 
     def toggle_rolling(self):
         if self.is_rolling:
@@ -189,7 +526,12 @@ class RandomNumberRolling(QWidget):
 
     def start_rolling(self):
         if self.entries and any(prize['count'] > 0 for prize in self.prizes):
-            self.rolling_window = RollingWindow(self.entries, self.prizes, self)
+            if self.draw_session is None:
+                self.draw_session = DrawSession(self.entries, self.draw_seed, get_draws_dir(), self.draw_segment)
+                self.draw_segment += 1
+                self.save_settings()
+            from rolling_window import RollingWindow
+            self.rolling_window = RollingWindow(self.draw_session, self.prizes, self, self.rolling_interval, self.prize_schedule)
             self.rolling_window.show()
             self.rolling_window.start_rolling()
             self.hide()
@@ -200,29 +542,184 @@ class RandomNumberRolling(QWidget):
         if hasattr(self, 'rolling_window'):
             self.rolling_window.pause_rolling()
 
+    def record_draws(self, winners, prize):
+        """记录一批中奖结果并立即写入日志"""
+        prize_name = self.prizes[prize]['name'] if prize is not None else None
+        self.winners.extend((prize_name, entry[0], entry[1]) for entry in winners)
+        self.data_manager.record_many([{'op': 'draw', 'id': entry[0], 'prize': prize} for entry in winners])
+
+    def apply_draw_results(self):
+        """把抽奖引擎中的中奖条目从名单中移除"""
+        if self.draw_session is None:
+            return
+        winners = self.draw_session.engine.pop_winners()
+        if winners:
+            self.model.remove([entry[0] for entry in winners])
+            self.update_count()
+
+    def end_draw_session(self):
+        """名单被修改，结束当前这一段抽奖；下次开始抽奖时用新名单开始新的一段"""
+        if self.draw_session is not None:
+            self.apply_draw_results()
+            self.draw_session.close()
+            self.draw_session = None
+
+    def set_draw_seed(self):
+        seed, ok = QInputDialog.getText(self, "抽奖种子", "请在活动开始前公布抽奖种子：", text=self.draw_seed)
+        if ok and seed and seed != self.draw_seed:
+            self.end_draw_session()
+            self.draw_seed = seed
+            self.save_settings()
+
+    def set_prize_schedule(self):
+        labels = list(SCHEDULES.values())
+        label, ok = QInputDialog.getItem(self, "抽奖顺序", "请选择奖项的抽奖顺序：", labels,
+                                         labels.index(SCHEDULES[self.prize_schedule]), False)
+        if ok:
+            self.prize_schedule = next(key for key, value in SCHEDULES.items() if value == label)
+            self.save_settings()
+
     def on_select(self, item):
         pass
 
     def import_excel(self):
-        fname = QFileDialog.getOpenFileName(self, '导入Excel', os.getcwd(), "Excel files (*.xlsx)")
+        fname = QFileDialog.getOpenFileName(self, '导入Excel', os.getcwd(), "名单文件 (*.xlsx *.csv)")
         if fname[0]:
-            try:
-                df = pd.read_excel(fname[0])
-                self.entries = list(df.itertuples(index=False, name=None))
-                self.current_id = max((entry[0] for entry in self.entries), default=0) + 1
-                self.update_listbox()
-            except Exception as e:
-                QMessageBox.critical(self, "导入错误", f"导入Excel文件时发生错误: {str(e)}")
+            # 在后台线程分块读取，界面保持响应；表头与字段的对应关系见设置中的 import_columns
+            importer = RosterImporter(fname[0], self.import_columns, check_duplicates=True)
+            self.start_import(importer, "导入Excel", "正在导入名单...", self.finish_import)
+
+    def sync_roster(self):
+        """用更新后的名单文件同步当前名单：后台比较出差异，确认后只应用变更，手工添加的人可以保留"""
+        fname = QFileDialog.getOpenFileName(self, '同步名单', os.getcwd(), "名单文件 (*.xlsx *.csv)")
+        if fname[0]:
+            winners = [(entry_id, name) for prize, entry_id, name in self.winners]
+            sync = RosterSync(fname[0], self.entries.rows(), winners, self.import_columns)
+            self.start_import(sync, "同步名单", "正在比较名单...", self.finish_sync)
+
+    def start_import(self, importer, title, label, finished):
+        self.import_worker = Worker(importer.run, self)
+        self.import_progress = QProgressDialog(label, "取消", 0, 0, self)
+        self.import_progress.setWindowTitle(title)
+        self.import_progress.setWindowModality(Qt.WindowModal)
+        # 读完所有行后可能还要检查重复，进度条走满时不自动关闭，等后台线程结束再关
+        self.import_progress.setAutoClose(False)
+        self.import_progress.setAutoReset(False)
+        self.import_progress.canceled.connect(self.import_worker.cancel)
+        self.import_worker.progress.connect(self.update_import_progress)
+        self.import_worker.succeeded.connect(lambda result: finished(result, importer))
+        self.import_worker.failed.connect(self.import_failed)
+        self.import_worker.finished.connect(self.import_progress.close)
+        self.import_worker.start()
+        self.import_progress.show()
+
+    def update_import_progress(self, done, total):
+        self.import_progress.setMaximum(total)
+        self.import_progress.setValue(done)
+
+    def finish_import(self, store, importer):
+        """导入完成后在界面线程中一次性替换名单"""
+        self.end_draw_session()
+        self.entries.take(store)
+        self.model.refresh()
+        self.build_search_index()
+        self.update_count()
+        self.save_data()  # 导入整体替换了名单，直接保存快照
+        summary = f"成功导入 {importer.added} 条，跳过重复 {importer.skipped} 条，无效 {importer.invalid} 条。"
+        if importer.suspects:
+            self.review_duplicates("导入Excel", summary, importer.suspects)
+        else:
+            QMessageBox.information(self, "导入Excel", summary)
+
+    def review_duplicates(self, title, summary, suspects):
+        """列出疑似重复的人供核对；规范化后相同的可以直接删除，每组保留名单中靠前的一个"""
+        same = [group for reason, group in suspects if reason == 'same']
+        extra = [entry[0] for group in same for entry in group[1:]]
+        text = (f"{summary}\n\n发现 {len(suspects)} 组疑似重复（规范化后相同 {len(same)} 组，"
+                f"相似 {len(suspects) - len(same)} 组），请在详细信息中核对，也可以在搜索框中查找。")
+        box = QMessageBox(QMessageBox.Warning, title, text, parent=self)
+        box.setDetailedText(describe(suspects))
+        remove_button = box.addButton(f"删除规范化后相同的 {len(extra)} 人", QMessageBox.DestructiveRole) if extra else None
+        box.addButton("保留全部", QMessageBox.AcceptRole)
+        box.exec_()
+        if remove_button is not None and box.clickedButton() is remove_button:
+            removed = self.remove_entries(extra)
+            QMessageBox.information(self, title, f"已删除 {len(removed)} 人。")
+
+    def finish_sync(self, diff, sync):
+        """显示变更摘要，确认后应用；可以选择保留表中已没有的人（如现场手工添加的）"""
+        notes = f"\n\n已中奖跳过 {sync.won} 人，表内重复 {sync.skipped} 条，无效 {sync.invalid} 条。"
+        if not diff:
+            QMessageBox.information(self, "同步名单", f"名单没有变化，共 {diff.unchanged} 人。" + notes)
+            return
+        box = QMessageBox(QMessageBox.Question, "同步名单", diff.summary(self.entries) + notes, parent=self)
+        apply_button = box.addButton("应用全部变更", QMessageBox.AcceptRole)
+        keep_button = box.addButton("保留表中没有的人", QMessageBox.AcceptRole) if diff.deletes else None
+        box.addButton("取消", QMessageBox.RejectRole)
+        box.exec_()
+        if box.clickedButton() in (apply_button, keep_button):
+            self.apply_sync(diff, box.clickedButton() is apply_button)
+
+    def apply_sync(self, diff, delete_missing=True):
+        """只应用差异：名单、视图和搜索索引按变更增量更新，日志一次写入"""
+        self.end_draw_session()
+        removed = self.model.remove(diff.deletes) if delete_missing and diff.deletes else []
+        renamed = self.model.rename_many(diff.renames)
+        reweighted = self.entries.set_weights(diff.weights)  # 列表中不显示权重，不必通知视图
+        added = self.model.add_many(diff.inserts)
+        records = []
+        if removed:
+            records.append({'op': 'delete', 'ids': [entry[0] for entry in removed]})
+        if renamed:
+            records.append({'op': 'rename', 'names': list(renamed.items())})
+        if reweighted:
+            records.append({'op': 'weight', 'weights': list(reweighted.items())})
+        records.extend({'op': 'add', 'id': entry_id, 'name': name, 'weight': weight} for entry_id, name, weight in added)
+        if records:
+            self.data_manager.record_many(records)
+        self.update_count()
+        skipped = len(diff.inserts) - len(added) + len(diff.renames) - len(renamed)
+        QMessageBox.information(self, "同步名单", f"新增 {len(added)} 人，改名 {len(renamed)} 人，修改权重 {len(reweighted)} 人，删除 {len(removed)} 人"
+                                + (f"，因编号或姓名冲突跳过 {skipped} 人" if skipped else "") + "。")
+
+    def import_failed(self, message):
+        QMessageBox.critical(self, "导入错误", f"导入Excel文件时发生错误: {message}")
 
     def export_excel(self):
-        if self.entries:
-            fname = QFileDialog.getSaveFileName(self, '导出Excel', os.getcwd(), "Excel files (*.xlsx)")
+        """导出剩余名单和全部中奖记录"""
+        if self.entries or self.winners:
+            fname = QFileDialog.getSaveFileName(self, '导出Excel', os.getcwd(), "Excel files (*.xlsx);;CSV files (*.csv);;JSON Lines (*.jsonl)")
             if fname[0]:
-                try:
-                    df = pd.DataFrame(self.entries, columns=['编号', '姓名'])
-                    df.to_excel(fname[0], index=False)
-                except Exception as e:
-                    QMessageBox.critical(self, "导出错误", f"导出Excel文件时发生错误: {str(e)}")
+                winners = list(self.winners)
+                self.start_export(Exporter(fname[0], self.entries.rows(), winners, len(self.entries)), len(winners))
+
+    def export_new_winners(self):
+        """只导出上次导出之后新增的中奖记录，用于活动中途的快照"""
+        winners = self.winners[self.exported_winners:]
+        if not winners:
+            QMessageBox.information(self, "导出新增中奖名单", "上次导出后没有新的中奖记录。")
+            return
+        fname = QFileDialog.getSaveFileName(self, '导出新增中奖名单', os.getcwd(), "Excel files (*.xlsx);;CSV files (*.csv);;JSON Lines (*.jsonl)")
+        if fname[0]:
+            self.start_export(Exporter(fname[0], None, winners), self.exported_winners + len(winners))
+
+    def start_export(self, exporter, exported_winners):
+        """在后台线程导出；成功后把导出位置记为 exported_winners"""
+        self.export_worker = Worker(exporter.run, self)
+        self.export_progress = QProgressDialog("正在导出...", "取消", 0, max(exporter.total, 1), self)
+        self.export_progress.setWindowTitle("导出")
+        self.export_progress.setWindowModality(Qt.NonModal)
+        self.export_progress.canceled.connect(self.export_worker.cancel)
+        self.export_worker.progress.connect(lambda done, total: self.export_progress.setValue(done))
+        self.export_worker.succeeded.connect(lambda written: self.finish_export(exported_winners))
+        self.export_worker.failed.connect(lambda message: QMessageBox.critical(self, "导出错误", f"导出Excel文件时发生错误: {message}"))
+        self.export_worker.finished.connect(self.export_progress.close)
+        self.export_worker.start()
+        self.export_progress.show()
+
+    def finish_export(self, exported_winners):
+        self.exported_winners = exported_winners
+        self.save_settings()
 
     def exit_program(self):
         self.save_settings()
@@ -307,13 +804,32 @@ class RandomNumberRolling(QWidget):
         QMessageBox.information(self, "复位抽奖", "抽奖状态已复位。")
 
     def open_prize_management(self):
+        from prize_management_window import PrizeManagementWindow
         self.prize_management_window = PrizeManagementWindow(self.prizes, self)
         self.prize_management_window.show()
 
+def profile_argument(argv):
+    """--profile [文件]：开启性能记录，退出时写出 trace，默认写到数据目录下的 profile.json"""
+    if '--profile' not in argv:
+        return None
+    index = argv.index('--profile')
+    argv.pop(index)
+    if index < len(argv) and not argv[index].startswith('-'):
+        return argv.pop(index)
+    return os.path.join(get_app_dir(), 'profile.json')
+
+
 if __name__ == '__main__':
+    profile_path = profile_argument(sys.argv)
+    if profile_path:
+        profiler.enable(profile_path)
     app = QApplication(sys.argv)
     ex = RandomNumberRolling()
+    app.aboutToQuit.connect(ex.stop_workers)
     app.aboutToQuit.connect(ex.save_data)
     app.aboutToQuit.connect(ex.save_settings)
+    app.aboutToQuit.connect(ex.data_manager.close)  # 写出还在等待的设置和奖品修改
+    if profile_path:
+        app.aboutToQuit.connect(profiler.active().dump)
     ex.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,521 @@
+import hashlib
+from array import array
+from itertools import accumulate, compress, islice, repeat
+from operator import add, itemgetter
+
+EMPTY = 0  # 哈希表中的空槽
+DELETED = -1  # 哈希表中已删除的槽；其余值为 行号 + 1
+MAX_LOAD = 0.7  # 哈希表（含已删除的槽）超过这个比例时压缩并重建
+FIBONACCI = 11400714819323198485  # 2^64 / 黄金分割比，把编号打散到表的高位
+MASK64 = 0xFFFFFFFFFFFFFFFF
+LOAD_CHUNK = 65536  # load() 每次整块写入各列的条数
+
+
+class ParticipantStore:
+    """
+    参与者名单，按列存储：编号在 array('q') 中，姓名以 UTF-8 连续存放在一个 bytearray 中，
+    每行只记录姓名的起始偏移和长度，不为每个人保存元组或字符串对象，百万人的名单只占几十 MB。
+    编号和姓名各有一个开放寻址哈希表（array('i')，保存 行号 + 1），
+    添加、查找、改名、删除都是 O(1)。
+    删除时只标记该行，下次按行访问时再统一压缩，因此连续删除不会反复移动整张表。
+    每个条目可以有一个抽奖权重，默认为 1；只有非默认的权重才存入 self.weights。
+    """
+
+    def __init__(self, entries=()):
+        self.clear()
+        self.load(entries)
+
+    def clear(self):
+        self.id_column = array('q')  # 每行的编号
+        self.name_start = array('Q')  # 每行姓名在 name_data 中的起始偏移
+        self.name_length = array('I')  # 每行姓名的字节数
+        self.name_data = bytearray()  # 所有姓名的 UTF-8 编码，依次相连
+        self.alive = bytearray()  # 每行是否有效，删除后为 0
+        self.weights = {}  # 编号 -> 权重（仅非 1 的条目）
+        self.count = 0
+        self.holes = 0
+        self.max_id = 0
+        self.resize_tables(8)
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return bool(self.count)
+
+    def __contains__(self, entry_id):
+        return self.id_row(entry_id) is not None
+
+    def __iter__(self):
+        return self.snapshot()
+
+    def __getitem__(self, row):
+        """按行取条目 (编号, 姓名)，支持切片"""
+        self.compact()
+        if isinstance(row, slice):
+            return [(self.id_column[i], self.name_at(i)) for i in range(*row.indices(len(self.id_column)))]
+        if row < 0:
+            row += len(self.id_column)
+        if not 0 <= row < len(self.id_column):
+            raise IndexError(row)
+        return (self.id_column[row], self.name_at(row))
+
+    @property
+    def next_id(self):
+        return self.max_id + 1
+
+    # ---- 列和哈希表 ----
+
+    def name_at(self, row):
+        start = self.name_start[row]
+        return self.name_data[start:start + self.name_length[row]].decode('utf-8')
+
+    def id_at(self, row):
+        """按行取编号"""
+        self.compact()
+        return self.id_column[row]
+
+    def id_slot(self, entry_id):
+        """编号在哈希表中的起始槽；整数的哈希值就是它本身，乘以 FIBONACCI 后取高位，连续的编号不会连成一片"""
+        return ((hash(entry_id) * FIBONACCI) & MASK64) >> self.shift
+
+    def name_slot(self, encoded):
+        """姓名（UTF-8 编码）在哈希表中的起始槽；bytes 的哈希值已充分打散，直接取低位，重建时也不必解码"""
+        return hash(encoded) & self.mask
+
+    def id_row(self, entry_id):
+        """编号所在的行，不存在时返回 None"""
+        table, mask, id_column = self.id_table, self.mask, self.id_column
+        slot = self.id_slot(entry_id)
+        value = table[slot]
+        while value:
+            if value > 0 and id_column[value - 1] == entry_id:
+                return value - 1
+            slot = (slot + 1) & mask
+            value = table[slot]
+        return None
+
+    def name_row(self, name, encoded=None):
+        """姓名所在的行，不存在时返回 None"""
+        if encoded is None:
+            encoded = name.encode('utf-8')
+        table, mask = self.name_table, self.mask
+        starts, lengths, data = self.name_start, self.name_length, self.name_data
+        size = len(encoded)
+        slot = hash(encoded) & mask
+        value = table[slot]
+        while value:
+            if value > 0:
+                start = starts[value - 1]
+                if lengths[value - 1] == size and data[start:start + size] == encoded:
+                    return value - 1
+            slot = (slot + 1) & mask
+            value = table[slot]
+        return None
+
+    def insert_slot(self, table, slot, row):
+        """从起始槽 slot 起把行号写入第一个空槽或已删除的槽，返回是否占用了一个空槽"""
+        mask = self.mask
+        while table[slot] > 0:
+            slot = (slot + 1) & mask
+        was_empty = table[slot] == EMPTY
+        table[slot] = row + 1
+        return was_empty
+
+    def delete_slot(self, table, slot, row):
+        """从起始槽 slot 起找到 row 所在的槽并删除，返回因此还原为空槽的槽数"""
+        mask = self.mask
+        while table[slot] != row + 1:
+            slot = (slot + 1) & mask
+        if table[(slot + 1) & mask] != EMPTY:
+            table[slot] = DELETED  # 还有探测路径经过这里，只能标为已删除
+            return 0
+        # 探测路径到此为止：这个槽和紧挨在它前面的已删除槽都可以还原为空槽，推迟重建
+        freed = 0
+        while True:
+            table[slot] = EMPTY
+            freed += 1
+            slot = (slot - 1) & mask
+            if table[slot] != DELETED:
+                return freed
+
+    def resize_tables(self, capacity):
+        self.mask = mask = capacity - 1
+        self.shift = shift = 64 - (capacity.bit_length() - 1)
+        self.limit = int(MAX_LOAD * capacity)  # 非空的槽达到此数时重建
+        self.id_table = id_table = array('i', bytes(4 * capacity))
+        self.name_table = name_table = array('i', bytes(4 * capacity))
+        alive = bytes(self.alive)
+        names = name_slices(self.name_start, self.name_length, bytes(self.name_data), alive)
+        for row, entry_id, encoded in zip(compress(range(len(alive)), alive), compress(self.id_column, alive), names):
+            # 表是新建的，没有已删除的槽，找到第一个空槽即可
+            slot = ((hash(entry_id) * FIBONACCI) & MASK64) >> shift
+            while id_table[slot]:
+                slot = (slot + 1) & mask
+            id_table[slot] = row + 1
+            slot = hash(encoded) & mask
+            while name_table[slot]:
+                slot = (slot + 1) & mask
+            name_table[slot] = row + 1
+        # 各表中非空的槽数（计入已删除的槽），决定何时重建
+        self.id_filled = self.name_filled = self.count
+
+    def reserve(self, extra=1):
+        """再写入 extra 个姓名前保证哈希表有空位；需要时压缩并按人数的两倍重建"""
+        if max(self.id_filled, self.name_filled) + extra > self.limit:
+            capacity = 8
+            while capacity < 2 * (self.count + extra):
+                capacity <<= 1
+            self.compact(capacity)
+
+    # ---- 增删改查 ----
+
+    def load(self, entries, size=None):
+        """
+        用 (编号, 姓名) 或 (编号, 姓名, 权重) 替换整个名单，返回因编号或姓名重复而跳过的条目数。
+        size 为预计条数（entries 有长度时自动取得），据此一次建好哈希表，加载过程中不再重建。
+        """
+        self.clear()
+        if size is None and hasattr(entries, '__len__'):
+            size = len(entries)
+        if size:
+            self.reserve(size)
+        entries = iter(entries)
+        skipped = 0
+        while True:
+            chunk = list(islice(entries, LOAD_CHUNK))
+            if not chunk:
+                break
+            self.reserve(len(chunk))
+            skipped += self.append_rows(chunk)
+        self.compact()
+        return skipped
+
+    def append_rows(self, entries):
+        """
+        把一块 (编号, 姓名[, 权重]) 整块追加到各列，再逐行查重并写入哈希表，返回因重复而跳过的条目数。
+        调用前须 reserve(len(entries))；重复的行只标为删除，由之后的压缩清除。
+        """
+        id_column, starts, lengths, data, alive = self.id_column, self.name_start, self.name_length, self.name_data, self.alive
+        first = len(id_column)
+        encoded = [entry[1].encode('utf-8') for entry in entries]
+        sizes = array('I', map(len, encoded))
+        id_column.extend(map(itemgetter(0), entries))
+        starts.extend(accumulate(sizes[:-1], initial=len(data)))
+        lengths.extend(sizes)
+        data += b''.join(encoded)
+        alive += b'\x01' * len(entries)
+        id_table, name_table, mask, shift, weights = self.id_table, self.name_table, self.mask, self.shift, self.weights
+        skipped = 0
+        for row, entry, name in zip(range(first, len(id_column)), entries, encoded):
+            # 与 add 相同的查重，展开在循环里，不逐行调用方法
+            entry_id = entry[0]
+            id_slot = ((hash(entry_id) * FIBONACCI) & MASK64) >> shift
+            value = id_table[id_slot]
+            while value:
+                if value > 0 and id_column[value - 1] == entry_id:
+                    break
+                id_slot = (id_slot + 1) & mask
+                value = id_table[id_slot]
+            if not value:
+                size = len(name)
+                name_slot = hash(name) & mask
+                value = name_table[name_slot]
+                while value:
+                    if value > 0:
+                        start = starts[value - 1]
+                        if lengths[value - 1] == size and data[start:start + size] == name:
+                            break
+                    name_slot = (name_slot + 1) & mask
+                    value = name_table[name_slot]
+            if value:
+                alive[row] = 0
+                skipped += 1
+                continue
+            id_table[id_slot] = row + 1
+            name_table[name_slot] = row + 1
+            if len(entry) > 2 and entry[2] != 1:
+                weights[entry_id] = entry[2]
+        added = len(entries) - skipped
+        self.count += added
+        self.holes += skipped
+        self.id_filled += added
+        self.name_filled += added
+        self.max_id = max(self.max_id, max(compress(id_column[first:], alive[first:]), default=0))
+        return skipped
+
+    def take(self, other):
+        """直接接管另一个名单的数据（如后台导入的结果），不做逐条复制"""
+        self.__dict__ = other.__dict__
+        other.__dict__ = {}
+        other.clear()
+
+    def add(self, name, entry_id=None, weight=1):
+        """添加条目并返回其编号；未指定编号时自动分配；姓名或编号已存在时返回 None"""
+        # 交互添加和导入时每人调用一次，查重和写入哈希表都在这里展开，不再调用 id_slot/name_row/insert_slot
+        if self.id_filled >= self.limit or self.name_filled >= self.limit:
+            self.reserve()
+        encoded = name.encode('utf-8')
+        size = len(encoded)
+        mask, starts, lengths, data, name_table = self.mask, self.name_start, self.name_length, self.name_data, self.name_table
+        name_slot = hash(encoded) & mask
+        name_free = -1
+        value = name_table[name_slot]
+        while value:
+            if value > 0:
+                start = starts[value - 1]
+                if lengths[value - 1] == size and data[start:start + size] == encoded:
+                    return None
+            elif name_free < 0:
+                name_free = name_slot
+            name_slot = (name_slot + 1) & mask
+            value = name_table[name_slot]
+        if entry_id is None:
+            entry_id = self.max_id + 1
+        id_column, id_table = self.id_column, self.id_table
+        id_slot = ((hash(entry_id) * FIBONACCI) & MASK64) >> self.shift
+        id_free = -1
+        value = id_table[id_slot]
+        while value:
+            if value > 0:
+                if id_column[value - 1] == entry_id:
+                    return None
+            elif id_free < 0:
+                id_free = id_slot
+            id_slot = (id_slot + 1) & mask
+            value = id_table[id_slot]
+        # 优先复用探测路径上已删除的槽
+        if id_free >= 0:
+            id_slot = id_free
+        else:
+            self.id_filled += 1
+        if name_free >= 0:
+            name_slot = name_free
+        else:
+            self.name_filled += 1
+        row = len(id_column)
+        id_column.append(entry_id)
+        starts.append(len(data))
+        lengths.append(size)
+        data += encoded
+        self.alive.append(1)
+        id_table[id_slot] = row + 1
+        name_table[name_slot] = row + 1
+        self.count += 1
+        if weight != 1:
+            self.weights[entry_id] = weight
+        if entry_id > self.max_id:
+            self.max_id = entry_id
+        return entry_id
+
+    def weight(self, entry_id):
+        return self.weights.get(entry_id, 1)
+
+    def set_weights(self, weights):
+        """按 {编号: 权重} 批量修改权重，返回实际修改的部分；编号不存在或权重未变的项跳过"""
+        changed = {}
+        for entry_id, weight in weights.items():
+            if entry_id in self and self.weights.get(entry_id, 1) != weight:
+                if weight == 1:
+                    del self.weights[entry_id]
+                else:
+                    self.weights[entry_id] = weight
+                changed[entry_id] = weight
+        return changed
+
+    def rows(self):
+        """遍历 (编号, 姓名, 权重)，用于持久化"""
+        return self.snapshot(weights=True)
+
+    def get(self, entry_id):
+        """按编号查姓名，不存在时返回 None"""
+        row = self.id_row(entry_id)
+        return self.name_at(row) if row is not None else None
+
+    def find(self, name):
+        """按姓名查编号，不存在时返回 None"""
+        row = self.name_row(name)
+        return self.id_column[row] if row is not None else None
+
+    def rename(self, entry_id, new_name):
+        """修改姓名，编号不存在或新姓名已被其他条目占用时返回 False；新姓名追加到缓冲区末尾，旧的在压缩时回收"""
+        row = self.id_row(entry_id)
+        if row is None:
+            return False
+        encoded = new_name.encode('utf-8')
+        owner = self.name_row(new_name, encoded)
+        if owner is not None:
+            return owner == row
+        self.reserve()
+        row = self.id_row(entry_id)  # 重建哈希表时可能压缩过
+        start = self.name_start[row]
+        self.name_filled -= self.delete_slot(self.name_table, self.name_slot(bytes(self.name_data[start:start + self.name_length[row]])), row)
+        self.name_start[row] = len(self.name_data)
+        self.name_length[row] = len(encoded)
+        self.name_data += encoded
+        self.name_filled += self.insert_slot(self.name_table, self.name_slot(encoded), row)
+        return True
+
+    def remove(self, entry_id):
+        """按编号删除条目并返回 (编号, 姓名)，不存在时返回 None"""
+        # 与 add 相同，查找和删除编号表中的槽都展开在这里
+        id_table, mask, id_column = self.id_table, self.mask, self.id_column
+        slot = ((hash(entry_id) * FIBONACCI) & MASK64) >> self.shift
+        value = id_table[slot]
+        while value:
+            if value > 0 and id_column[value - 1] == entry_id:
+                break
+            slot = (slot + 1) & mask
+            value = id_table[slot]
+        else:
+            return None
+        row = value - 1
+        self.id_filled -= self.delete_slot(id_table, slot, row)
+        start = self.name_start[row]
+        encoded = bytes(self.name_data[start:start + self.name_length[row]])
+        self.name_filled -= self.delete_slot(self.name_table, hash(encoded) & mask, row)
+        if self.weights:
+            self.weights.pop(entry_id, None)
+        self.alive[row] = 0
+        self.count -= 1
+        self.holes += 1
+        return (entry_id, encoded.decode('utf-8'))
+
+    def rows_of(self, entry_ids):
+        """一组编号当前所在的行号（升序、去重），不存在的编号忽略"""
+        self.compact()
+        rows = {self.id_row(entry_id) for entry_id in entry_ids}
+        rows.discard(None)
+        return sorted(rows)
+
+    def remove_many(self, entry_ids):
+        """按编号批量删除，返回被删除的 (编号, 姓名)；不存在的编号忽略"""
+        return self.remove_rows(self.rows_of(entry_ids))
+
+    def remove_rows(self, rows):
+        """
+        批量删除 rows_of 返回的行，返回被删除的 (编号, 姓名)。
+        只标记这些行，不逐个改写哈希表，最后压缩时整体重建一次。
+        """
+        id_column, alive, weights = self.id_column, self.alive, self.weights
+        removed = []
+        for row in rows:
+            entry_id = id_column[row]
+            alive[row] = 0
+            weights.pop(entry_id, None)
+            removed.append((entry_id, self.name_at(row)))
+        self.count -= len(removed)
+        self.holes += len(removed)
+        self.compact()
+        return removed
+
+    def rename_many(self, names):
+        """
+        按 {编号: 新姓名} 批量改名，返回实际修改的 {编号: 新姓名}。
+        作为一个整体检查重名，新姓名可以是本批中其他条目的旧姓名（如两人互换姓名）；
+        编号不存在、姓名未变、与本批之外的条目重名或在本批中重复的项被跳过。
+        """
+        self.reserve(len(names))  # 先保证哈希表有空位，之后的行号不再因重建而变化
+        counts = {}
+        for name in names.values():
+            counts[name] = counts.get(name, 0) + 1
+        pending = {}  # 行 -> (编号, 新姓名)
+        for entry_id, name in names.items():
+            row = self.id_row(entry_id)
+            if row is not None and counts[name] == 1 and self.name_at(row) != name:
+                pending[row] = (entry_id, name)
+        changed = True
+        while changed:
+            # 新姓名被本批之外（或被跳过）的条目占用时跳过，直到没有新的冲突
+            changed = False
+            for row, (entry_id, name) in list(pending.items()):
+                owner = self.name_row(name)
+                if owner is not None and owner not in pending:
+                    del pending[row]
+                    changed = True
+        for row in pending:
+            start = self.name_start[row]
+            self.name_filled -= self.delete_slot(self.name_table, self.name_slot(bytes(self.name_data[start:start + self.name_length[row]])), row)
+        for row, (entry_id, name) in pending.items():
+            encoded = name.encode('utf-8')
+            self.name_start[row] = len(self.name_data)
+            self.name_length[row] = len(encoded)
+            self.name_data += encoded
+            self.name_filled += self.insert_slot(self.name_table, self.name_slot(encoded), row)
+        return dict(pending.values())
+
+    def renumber(self, start=1):
+        """按当前顺序把编号重新编为 start, start+1, ...，返回 {旧编号: 新编号}"""
+        self.compact()
+        mapping = dict(zip(self.id_column, range(start, start + len(self.id_column))))
+        self.weights = {mapping[entry_id]: weight for entry_id, weight in self.weights.items()}
+        self.id_column = array('q', range(start, start + len(self.id_column)))
+        self.max_id = start + len(self.id_column) - 1 if self.id_column else 0
+        # 姓名和行号都没变，只重建编号表
+        self.id_table = id_table = array('i', bytes(4 * (self.mask + 1)))
+        shift, mask = self.shift, self.mask
+        for row, entry_id in enumerate(self.id_column):
+            slot = ((hash(entry_id) * FIBONACCI) & MASK64) >> shift
+            while id_table[slot]:
+                slot = (slot + 1) & mask
+            id_table[slot] = row + 1
+        self.id_filled = self.count
+        return mapping
+
+    def fingerprint(self):
+        """当前编号序列的摘要，日志据此判断重新编号是否已经生效"""
+        self.compact()
+        return hashlib.sha1(self.id_column.tobytes()).hexdigest()
+
+    def row_of(self, entry_id):
+        """返回条目当前所在的行号，不存在时返回 None"""
+        if self.id_row(entry_id) is None:
+            return None
+        self.compact()
+        return self.id_row(entry_id)
+
+    def compact(self, capacity=None):
+        """清除删除留下的空行和改名留下的旧姓名，并改写哈希表中的行号（给出 capacity 时按新大小重建）"""
+        if not self.holes:
+            if capacity is not None:
+                self.resize_tables(capacity)  # 没有空行，只需换一张更大的哈希表
+            return
+        # 用 compress/accumulate 在 C 层筛选各列，只有拼接姓名时逐行切片
+        alive, starts, data = self.alive, self.name_start, bytes(self.name_data)
+        self.id_column = array('q', compress(self.id_column, alive))
+        self.name_length = lengths = array('I', compress(self.name_length, alive))
+        self.name_data = bytearray().join(data[start:start + length]
+                                          for start, length in zip(compress(starts, alive), lengths))
+        self.name_start = array('Q', accumulate(lengths, initial=0))
+        self.name_start.pop()
+        self.alive = bytearray(b'\x01') * len(self.id_column)
+        self.holes = 0
+        if capacity is None:
+            # 表的大小不变时不重新计算哈希：按查表把两张表中的 行号 + 1 改为新的行号，
+            # 被删除的行所在的槽标为已删除（下标为 值 + 1，依次对应 DELETED、EMPTY、第 0 行……）
+            remap = array('i', [DELETED, EMPTY])
+            remap.extend([position if keep else DELETED for position, keep in zip(accumulate(alive), alive)])
+            lookup, offset = remap.__getitem__, (1).__add__
+            self.id_table = array('i', map(lookup, map(offset, self.id_table)))
+            self.name_table = array('i', map(lookup, map(offset, self.name_table)))
+        else:
+            self.resize_tables(capacity)
+
+    def snapshot(self, weights=False):
+        """
+        返回当前名单的快照迭代器 (编号, 姓名)，weights 为 True 时为 (编号, 姓名, 权重)，供后台线程遍历和持久化。
+        只复制几块连续内存；筛选、切片和解码都由 compress/map 在 C 层完成，不逐行执行 Python 代码。
+        """
+        id_column, alive = array('q', self.id_column), bytes(self.alive)
+        names = map(bytes.decode, name_slices(array('Q', self.name_start), array('I', self.name_length),
+                                              bytes(self.name_data), alive))
+        if not weights:
+            return zip(compress(id_column, alive), names)
+        weight = self.weights.copy().get
+        return zip(compress(id_column, alive), names, map(weight, compress(id_column, alive), repeat(1)))
+
+
+def name_slices(starts, lengths, data, alive):
+    """依次取出 alive 为 1 的各行姓名的 UTF-8 编码（data 为 bytes）；切片由 map 在 C 层完成"""
+    ends = map(add, compress(starts, alive), compress(lengths, alive))
+    return map(data.__getitem__, map(slice, compress(starts, alive), ends))
@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import tempfile
+import threading
+
+DEBOUNCE = 0.5  # 最后一次修改后等待多久再写盘（秒）
+
+
+def write_json_atomic(path, data):
+    """先写到同目录的临时文件并 fsync，再用 os.replace 换掉原文件；写到一半崩溃时原文件保持完整"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class DebouncedWriter:
+    """
+    合并短时间内的多次保存：schedule(key, write, data) 只记下每个 key 最新的数据，
+    最后一次修改 delay 秒后由后台线程统一调用 write(data) 写出，界面线程不等待磁盘。
+    data 应是调用方的副本，写出时不再读取可能被界面线程修改的对象。
+    flush() 立即在当前线程写出，退出和保存快照前调用。
+    """
+
+    def __init__(self, delay=DEBOUNCE):
+        self.delay = delay
+        self.pending = {}  # key -> (write, data)
+        self.deadline = 0
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()  # 后台写出和 flush() 互斥，同一个 key 不会乱序落盘
+        self.thread = None
+        self.closed = False
+
+    def schedule(self, key, write, data):
+        with self.condition:
+            if not self.closed:
+                self.pending[key] = (write, data)
+                self.deadline = time.monotonic() + self.delay
+                if self.thread is None:
+                    # 第一次保存时才启动线程，命令行和只读的用法不会多出一个线程
+                    self.thread = threading.Thread(target=self.run, name='debounced-writer', daemon=True)
+                    self.thread.start()
+                self.condition.notify()
+                return
+        # 已经关闭（程序正在退出），直接写出
+        with self.write_lock:
+            write(data)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.closed and (not self.pending or time.monotonic() < self.deadline):
+                    self.condition.wait(self.deadline - time.monotonic() if self.pending else None)
+                if self.closed:
+                    return
+            self.flush()
+
+    def flush(self, key=None):
+        """立即写出所有待写的数据（指定 key 时只写这一项）"""
+        with self.write_lock:
+            with self.condition:
+                if key is None:
+                    items, self.pending = self.pending, {}
+                elif key in self.pending:
+                    items = {key: self.pending.pop(key)}
+                else:
+                    return
+            for name, (write, data) in items.items():
+                try:
+                    write(data)
+                except Exception as e:
+                    print(f"Error saving {name}: {e}")
+
+    def close(self):
+        """写出剩余数据并停止后台线程"""
+        self.flush()
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
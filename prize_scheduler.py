@@ -0,0 +1,60 @@
+from collections import deque
+
+ORDERED = 'ordered'
+REVERSE = 'reverse'
+INTERLEAVED = 'interleaved'
+SCHEDULES = {ORDERED: '按奖品列表顺序', REVERSE: '从小奖开始（倒序）', INTERLEAVED: '各奖项轮流抽取'}
+
+
+class PrizeScheduler:
+    """
+    奖项调度：决定下一次为哪个奖项抽奖，并负责扣减奖品数量。
+    ordered 按奖品列表顺序逐个抽完；reverse 从列表末尾（通常是小奖）开始；
+    interleaved 每抽一次就轮到下一个奖项。
+    所有奖项共用一个候选池，抽中即移出，因此每人在所有奖项中最多中一次。
+    待抽奖项保存在双端队列中，记录一次抽取只需 O(1)，不重新扫描奖品列表。
+    """
+
+    def __init__(self, prizes, schedule=ORDERED):
+        if schedule not in SCHEDULES:
+            raise ValueError(f"未知的抽奖顺序 '{schedule}'")
+        self.prizes = prizes
+        self.schedule = schedule
+        order = range(len(prizes) - 1, -1, -1) if schedule == REVERSE else range(len(prizes))
+        self.queue = deque(index for index in order if prizes[index]['count'] > 0)
+
+    def __bool__(self):
+        return bool(self.queue)
+
+    def __len__(self):
+        """还没抽完的奖项数"""
+        return len(self.queue)
+
+    def current(self):
+        """当前奖项在 prizes 中的下标，全部抽完时为 None"""
+        return self.queue[0] if self.queue else None
+
+    def step(self):
+        """下一次抽取 (奖项下标, 人数)：轮流模式每次一人，其余模式一次抽完当前奖项"""
+        index = self.current()
+        if index is None:
+            return None
+        return index, 1 if self.schedule == INTERLEAVED else self.prizes[index]['count']
+
+    def plan(self, tiers=None):
+        """一次抽多个奖项：按调度顺序返回接下来 tiers 个奖项（默认全部）的 (下标, 剩余数量)"""
+        indexes = list(self.queue) if tiers is None else [self.queue[i] for i in range(min(tiers, len(self.queue)))]
+        return [(index, self.prizes[index]['count']) for index in indexes]
+
+    def record(self, index, drawn):
+        """记录当前奖项抽出了 drawn 人，返回该奖项是否已抽完"""
+        if index != self.current():
+            raise ValueError(f"奖项 {index} 不是当前奖项")
+        prize = self.prizes[index]
+        prize['count'] = max(prize['count'] - drawn, 0)
+        if prize['count'] <= 0:
+            self.queue.popleft()
+            return True
+        if self.schedule == INTERLEAVED:
+            self.queue.rotate(-1)
+        return False
@@ -0,0 +1,159 @@
+"""
+可选的性能记录：热点函数计时、延迟直方图和滚动帧间隔监视。
+默认关闭，关闭时每次调用只多一次模块变量判断；用 `python main.py --profile [文件]` 开启，
+退出时写出 Chrome trace JSON（可在 chrome://tracing 或 Perfetto 中打开）并打印统计摘要。
+"""
+import os
+import json
+import math
+import time
+import functools
+import threading
+
+MAX_EVENTS = 500000  # trace 中最多保留的事件数，超过后只更新统计
+MISSED_FACTOR = 1.5  # 帧间隔超过设定值的 1.5 倍记为错过一帧
+
+_profiler = None
+
+
+class Histogram:
+    """对数分桶的延迟直方图（每 2 倍分 8 桶），内存占用固定"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        bucket = math.floor(math.log2(ms) * 8) if ms > 0 else -100
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, p):
+        """返回桶上界，误差不超过 9%"""
+        target = self.count * p / 100
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return min(2 ** ((bucket + 1) / 8), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 4) if self.count else 0,
+            'p50_ms': round(self.percentile(50), 4),
+            'p95_ms': round(self.percentile(95), 4),
+            'p99_ms': round(self.percentile(99), 4),
+            'max_ms': round(self.max, 4),
+        }
+
+
+class Profiler:
+    def __init__(self, path):
+        self.path = path
+        self.origin = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self.events = []
+        self.histograms = {}
+        self.last_tick = {}
+        self.missed = {}
+        self.lock = threading.Lock()  # 导入导出在工作线程中运行，也可能记录
+
+    def histogram(self, name):
+        if name not in self.histograms:
+            self.histograms[name] = Histogram()
+        return self.histograms[name]
+
+    def record(self, name, begin, end, category='call'):
+        """记录一次耗时（perf_counter_ns 的起止时间）"""
+        with self.lock:
+            self.histogram(name).add((end - begin) / 1e6)
+            if len(self.events) < MAX_EVENTS:
+                self.events.append({
+                    'name': name, 'cat': category, 'ph': 'X', 'pid': self.pid, 'tid': threading.get_ident(),
+                    'ts': (begin - self.origin) / 1000, 'dur': (end - begin) / 1000,
+                })
+
+    def mark(self, name, **args):
+        """记录一个瞬时事件，例如错过的帧"""
+        with self.lock:
+            if len(self.events) < MAX_EVENTS:
+                self.events.append({
+                    'name': name, 'cat': 'mark', 'ph': 'i', 's': 't', 'pid': self.pid, 'tid': threading.get_ident(),
+                    'ts': (time.perf_counter_ns() - self.origin) / 1000, 'args': args,
+                })
+
+    def tick(self, name, interval):
+        """定时器每一帧调用：统计帧间隔、抖动（与设定间隔之差）和错过的帧"""
+        now = time.perf_counter_ns()
+        last = self.last_tick.get(name)
+        self.last_tick[name] = now
+        if last is None:
+            return
+        elapsed = (now - last) / 1e6
+        with self.lock:
+            self.histogram(f"{name}.interval").add(elapsed)
+            self.histogram(f"{name}.jitter").add(abs(elapsed - interval))
+        if elapsed > interval * MISSED_FACTOR:
+            self.missed[name] = self.missed.get(name, 0) + 1
+            self.mark(f"{name}.missed", interval_ms=round(elapsed, 3))
+
+    def summary(self):
+        stats = {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+        for name, missed in self.missed.items():
+            stats[f"{name}.interval"]['missed'] = missed
+        return stats
+
+    def dump(self):
+        stats = self.summary()
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms', 'otherData': stats}, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"Error writing profile: {e}")
+        for name, summary in stats.items():
+            print(f"{name}: " + ", ".join(f"{key}={value}" for key, value in summary.items()))
+        print(f"性能记录已写入 {self.path}")
+
+
+def enable(path):
+    """开启记录并返回 Profiler，需要在调用热点函数之前执行"""
+    global _profiler
+    _profiler = Profiler(path)
+    return _profiler
+
+
+def active():
+    return _profiler
+
+
+def timed(name):
+    """计时装饰器；不要用于连接到带参数信号（如 clicked）的槽，包装后的参数签名会变"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return func(*args, **kwargs)
+            begin = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _profiler.record(name, begin, time.perf_counter_ns())
+        return wrapper
+    return decorate
+
+
+def tick(name, interval):
+    if _profiler is not None:
+        _profiler.tick(name, interval)
+
+
+def reset_tick(name):
+    """定时器停止后调用，下一次开始时不把停顿算作一帧"""
+    if _profiler is not None:
+        _profiler.last_tick.pop(name, None)
@@ -0,0 +1,41 @@
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QFont, QPainter
+from profiler import timed
+
+ROLLING_COLORS = ['red', 'green', 'blue', 'purple', 'orange']  # 滚动时轮换的文字颜色
+
+
+class RollingRenderer(QWidget):
+    """
+    滚动抽奖的文字显示：在 paintEvent 中直接绘制。
+    颜色和字体只创建一次，每帧只替换文字和颜色并调用 update()，不再重新解析样式表。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)  # 背景由 paintEvent 自己填充
+        self.background = QColor('black')
+        self.colors = [QColor(name) for name in ROLLING_COLORS]
+        self.pause_color = QColor('blue')
+        self.color = QColor('white')
+        self.text = ""
+        self.text_font = QFont()
+        self.text_font.setBold(True)
+
+    def set_font_size(self, size):
+        self.text_font.setPixelSize(max(size, 1))
+        self.update()
+
+    def show_text(self, text, color):
+        self.text = text
+        self.color = color
+        self.update()
+
+    @timed('rolling.paint')
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.background)
+        painter.setFont(self.text_font)
+        painter.setPen(self.color)
+        painter.drawText(self.rect(), Qt.AlignCenter, self.text)
@@ -1,19 +1,29 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QMessageBox
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QGridLayout, QLabel, QMessageBox
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
-import random
-from collections import deque
+from rolling_renderer import RollingRenderer
+from draw_engine import LazyShuffle
+from profiler import timed, tick, reset_tick
+from prize_scheduler import PrizeScheduler, ORDERED
+
+BATCH_COLUMNS = 5  # 批量抽奖结果网格的列数
+BATCH_ROWS = 8  # 批量抽奖结果网格每页的行数
 
 class RollingWindow(QWidget):
-    def __init__(self, entries, prizes, parent):
+    def __init__(self, session, prizes, parent, interval=100, schedule=ORDERED):
         super().__init__()
-        self.entries = entries
+        self.session = session  # DrawSession，负责带种子的抽取和抽奖日志
+        self.engine = session.engine
         self.prizes = prizes
         self.is_rolling = False
-        self.current_prize_index = 0
+        self.scheduler = PrizeScheduler(prizes, schedule)  # 决定下一次抽哪个奖项并扣减数量
         self.parent = parent  # 保存对父窗口的引用
         self.font_size = 30  # 默认值，稍后会在 update_font_size 中更新
-        self.random_sequence = deque(random.sample(entries, len(entries)))  # 预生成随机序列
+        self.batch_winners = []  # 最近一次批量抽奖的结果（显示文字）
+        self.batch_page = 0
+        self.interval = interval  # 滚动刷新间隔（毫秒），不低于屏幕刷新周期
+        self.color_index = 0
+        self.shuffle = LazyShuffle(self.engine)  # 按需生成的随机顺序，不复制名单，也不消耗抽奖的随机数
         self.initUI()
 
     def initUI(self):
@@ -22,30 +32,55 @@ class RollingWindow(QWidget):
         self.setStyleSheet("background-color: black;")
         layout = QVBoxLayout()
         self.prize_label = QLabel("", self, alignment=Qt.AlignCenter)
-        self.label = QLabel("", self, alignment=Qt.AlignCenter)
+        self.display = RollingRenderer(self)
         layout.addWidget(self.prize_label)
-        layout.addWidget(self.label)
+        layout.addWidget(self.display, 1)
+
+        # 批量抽奖结果网格：格子只创建一次，翻页时只更新文字
+        self.results_widget = QWidget(self)
+        grid = QGridLayout(self.results_widget)
+        self.result_cells = []
+        for i in range(BATCH_ROWS * BATCH_COLUMNS):
+            cell = QLabel("", self.results_widget, alignment=Qt.AlignCenter)
+            grid.addWidget(cell, i // BATCH_COLUMNS, i % BATCH_COLUMNS)
+            self.result_cells.append(cell)
+        self.results_page_label = QLabel("", self, alignment=Qt.AlignCenter)
+        layout.addWidget(self.results_widget)
+        layout.addWidget(self.results_page_label)
+        self.results_widget.hide()
+        self.results_page_label.hide()
         self.setLayout(layout)
         self.showFullScreen()
         self.setFocusPolicy(Qt.StrongFocus)
         self.update_font_size()
 
+        self.rolling_timer = QTimer(self)
+        self.rolling_timer.setTimerType(Qt.PreciseTimer)
+        self.rolling_timer.timeout.connect(self.update_rolling_display)
+        refresh_rate = self.screen().refreshRate()
+        if refresh_rate > 0:
+            self.interval = max(self.interval, int(1000 / refresh_rate))
+
     def update_font_size(self):
         """根据屏幕大小动态调整字体大小"""
         screen_geometry = self.screen().availableGeometry()
         self.font_size = screen_geometry.height() // 8  # 根据屏幕高度计算字体大小
 
-        # 使用 QFont 设置字体大小
-        font = QFont()
-        font.setPointSize(self.font_size)
-        self.label.setFont(font)
-        self.label.setStyleSheet("color: white; font-weight: bold;")
-        
+        self.display.set_font_size(self.font_size)
+
         prize_font = QFont()
         prize_font.setPointSize(self.font_size // 3)
         self.prize_label.setFont(prize_font)
         self.prize_label.setStyleSheet("color: yellow;")
 
+        cell_font = QFont()
+        cell_font.setPointSize(max(self.font_size // 5, 8))
+        for cell in self.result_cells:
+            cell.setFont(cell_font)
+            cell.setStyleSheet("color: white;")
+        self.results_page_label.setFont(prize_font)
+        self.results_page_label.setStyleSheet("color: gray;")
+
     def resizeEvent(self, event):
         """窗口大小变化时调整字体大小"""
         self.update_font_size()
@@ -53,65 +88,130 @@ class RollingWindow(QWidget):
 
     def start_rolling(self):
         """开始滚动"""
-        if not self.entries:
+        if not self.engine:
             self.show_message(QMessageBox.Warning, "错误", "没有可用的抽奖条目！")
             return
+        if not self.scheduler:
+            self.show_message(QMessageBox.Information, "提示", "所有奖品已抽完！")
+            return
+        self.hide_batch_results()
+        self.update_prize_label()
         self.is_rolling = True
-        self.rolling_timer = QTimer(self)
-        self.rolling_timer.timeout.connect(self.update_rolling_display)
-        self.rolling_timer.start(100)
+        reset_tick('rolling.frame')
+        self.rolling_timer.start(self.interval)
 
+    def update_prize_label(self):
+        """奖项文字只在开始和抽中时更新，不在每一帧重设"""
+        index = self.scheduler.current()
+        if index is not None:
+            current_prize = self.prizes[index]
+            self.prize_label.setText(f"当前奖项: {current_prize['name']} ({current_prize['count']}个)")
+
+    @timed('rolling.update_display')
     def update_rolling_display(self):
         """更新滚动显示"""
         if self.is_rolling:
-            if not self.random_sequence:
-                self.random_sequence = deque(random.sample(self.entries, len(self.entries)))
-            selected_entry = self.random_sequence.popleft()
-            self.label.setText(f"{selected_entry[0]} {selected_entry[1]}")
-            if self.prizes:
-                current_prize = self.prizes[self.current_prize_index]
-                self.prize_label.setText(f"当前奖项: {current_prize['name']} ({current_prize['count']}个)")
-            # 动态改变文字颜色，字体大小使用 self.font_size
-            self.label.setStyleSheet(
-                f"color: {random.choice(['red', 'green', 'blue', 'purple', 'orange'])}; "
-                f"font-size: {self.font_size}px; font-weight: bold; text-shadow: 2px 2px 4px rgba(0,0,0,0.5);"
-            )
+            tick('rolling.frame', self.interval)
+            selected_entry = self.shuffle.next()
+            if selected_entry is None:
+                return
+            # 依次轮换预先创建的颜色
+            self.color_index = (self.color_index + 1) % len(self.display.colors)
+            self.display.show_text(f"{selected_entry[0]} {selected_entry[1]}", self.display.colors[self.color_index])
 
+    @timed('rolling.pause')
     def pause_rolling(self):
         """暂停滚动并抽奖"""
         self.is_rolling = False
         self.rolling_timer.stop()
-        if self.entries:
-            selected_entry = random.choice(self.entries)
-            self.label.setText(f"{selected_entry[0]} {selected_entry[1]}")
-            self.entries.remove(selected_entry)  # 移除已抽中的条目
-            if self.prizes:
-                current_prize = self.prizes[self.current_prize_index]
-                self.prize_label.setText(f"当前奖项: {current_prize['name']} ({current_prize['count']}个)")
-                if current_prize['count'] > 0:
-                    current_prize['count'] -= 1
-                if current_prize['count'] <= 0:
-                    # 使用自定义消息弹窗样式
-                    self.show_message(QMessageBox.Information, "提示",
-                                      f"奖品 {current_prize['name']} 已抽完，即将切换到下一个奖品！")
-                    self.current_prize_index += 1
-                    if self.current_prize_index >= len(self.prizes):
-                        msg_box = QMessageBox(self)
-                        msg_box.setWindowTitle("抽奖结束")
-                        msg_box.setText("所有奖品已抽完！")
-                        msg_box.setStyleSheet("""
-                            QMessageBox { background-color: white; color: black; }
-                            QMessageBox QLabel { color: green; background-color: lightgray; }
-                            QMessageBox QPushButton { background-color: lightgray; border: 1px solid gray; padding: 5px; }
-                        """)
-                        msg_box.exec_()
-                        self.close()
-                        self.parent.show()
-                        return
-        # 暂停时固定字体颜色为蓝色，字体大小使用 self.font_size
-        self.label.setStyleSheet(
-            f"color: blue; font-size: {self.font_size}px; font-weight: bold;"
-        )
+        index = self.scheduler.current()
+        selected_entry = self.session.draw(index)  # 抽中的条目由引擎移出候选池
+        if selected_entry is None:
+            self.show_message(QMessageBox.Warning, "错误", "没有可用的抽奖条目！")
+            return
+        self.record_draws([selected_entry], index)
+        # 暂停时固定为蓝色
+        self.display.show_text(f"{selected_entry[0]} {selected_entry[1]}", self.display.pause_color)
+        if index is not None:
+            current_prize = self.prizes[index]
+            finished = self.scheduler.record(index, 1)
+            # 奖项切换只在文字中提示，不弹窗打断，整场抽奖无需操作员确认
+            text = f"{current_prize['name']} 中奖: {selected_entry[0]} {selected_entry[1]}"
+            if finished:
+                text += f"  {current_prize['name']} 已抽完"
+            self.prize_label.setText(text + self.next_prize_text())
+
+    @timed('rolling.batch_draw')
+    def batch_draw(self, all_tiers=False):
+        """
+        一次抽出当前奖项的全部剩余名额（all_tiers 为 True 时按调度顺序抽完所有奖项），
+        各奖项从同一个候选池中抽取，结果以分页网格显示
+        """
+        if self.is_rolling:
+            self.is_rolling = False
+            self.rolling_timer.stop()
+        if not self.engine or not self.scheduler:
+            return
+        lines = []
+        for index, count in self.scheduler.plan(None if all_tiers else 1):
+            winners = self.session.draw_many(count, index)
+            if not winners:
+                break
+            self.record_draws(winners, index)
+            self.scheduler.record(index, len(winners))
+            prefix = f"{self.prizes[index]['name']} " if all_tiers else ""
+            lines.extend(f"{prefix}{entry[0]} {entry[1]}" for entry in winners)
+        name = "全部奖项" if all_tiers else self.prizes[index]['name']
+        self.prize_label.setText(f"{name} (本轮抽出 {len(lines)} 人)" + self.next_prize_text())
+        self.show_batch_results(lines)
+
+    def next_prize_text(self):
+        index = self.scheduler.current()
+        if index is None:
+            return "  所有奖品已抽完，按 Esc 退出"
+        return f"  下一个: {self.prizes[index]['name']}"
+
+    def record_draws(self, winners, index):
+        """中奖结果立即交给主窗口记录并写入日志，程序崩溃也不会丢失"""
+        self.parent.record_draws(winners, index)
+
+    def show_batch_results(self, lines):
+        """显示批量抽奖结果的第一页，每个格子一行文字"""
+        self.batch_winners = lines
+        self.batch_page = 0
+        self.display.hide()
+        self.results_widget.show()
+        self.results_page_label.show()
+        self.update_batch_page()
+
+    def hide_batch_results(self):
+        """隐藏结果网格，恢复单个滚动显示"""
+        self.results_widget.hide()
+        self.results_page_label.hide()
+        self.display.show()
+
+    def update_batch_page(self):
+        """把当前页的中奖者填入网格"""
+        page_size = len(self.result_cells)
+        total_pages = max((len(self.batch_winners) + page_size - 1) // page_size, 1)
+        start = self.batch_page * page_size
+        page = self.batch_winners[start:start + page_size]
+        for i, cell in enumerate(self.result_cells):
+            cell.setText(page[i] if i < len(page) else "")
+        self.results_page_label.setText(f"第 {self.batch_page + 1} / {total_pages} 页 (←/→ 翻页)")
+
+    def change_batch_page(self, step):
+        """翻页，越界时不动"""
+        page_size = len(self.result_cells)
+        new_page = self.batch_page + step
+        if 0 <= new_page * page_size < len(self.batch_winners):
+            self.batch_page = new_page
+            self.update_batch_page()
+
+    def closeEvent(self, event):
+        """关闭时把中奖结果同步回主窗口名单"""
+        self.parent.apply_draw_results()
+        super().closeEvent(event)
 
     def keyPressEvent(self, event):
         """键盘事件处理"""
@@ -125,7 +225,15 @@ class RollingWindow(QWidget):
                 self.pause_rolling()
             else:
                 self.start_rolling()
+        elif event.key() in (Qt.Key_Return, Qt.Key_Enter):
+            # Ctrl+回车按调度顺序一次抽完所有剩余奖项
+            self.batch_draw(all_tiers=bool(event.modifiers() & Qt.ControlModifier))
+        elif event.key() == Qt.Key_Left and self.results_widget.isVisible():
+            self.change_batch_page(-1)
+        elif event.key() == Qt.Key_Right and self.results_widget.isVisible():
+            self.change_batch_page(1)
 
+    @timed('rolling.message_box')
     def show_message(self, icon, title, text, buttons=QMessageBox.Ok, defaultButton=QMessageBox.Ok):
         """
         辅助函数：显示一个自定义样式的消息弹窗
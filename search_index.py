@@ -0,0 +1,141 @@
+from array import array
+from itertools import repeat
+
+_pinyin = None  # pypinyin 是可选依赖，第一次用到时才尝试加载；未安装时为 False
+
+
+def pinyin_text(name):
+    """中文姓名的全拼和首字母（如 '张三' -> 'zhangsan zs'）；姓名不含中文或未安装 pypinyin 时返回空串"""
+    global _pinyin
+    if name.isascii():
+        return ''
+    if _pinyin is None:
+        try:
+            from pypinyin import lazy_pinyin, Style
+            _pinyin = lambda text: (''.join(lazy_pinyin(text)) + ' ' +
+                                    ''.join(lazy_pinyin(text, style=Style.FIRST_LETTER))).lower()
+        except ImportError:
+            _pinyin = False
+    return _pinyin(name) if _pinyin else ''
+
+
+def search_text(name):
+    """姓名的检索串：忽略大小写，安装了 pypinyin 时附加拼音，用 \\0 分隔，查询不会跨越两部分"""
+    text = name.casefold()
+    pinyin = pinyin_text(name)
+    return text + '\0' + pinyin if pinyin else text
+
+
+def grams(text):
+    """检索串中出现的单字和相邻两字"""
+    result = set(text)
+    result.update(text[i:i + 2] for i in range(len(text) - 1))
+    result.discard('\0')
+    return result
+
+
+def build_index(entries, progress=None, cancelled=None):
+    """
+    为名单快照 [(编号, 姓名)] 建立 SearchIndex，在后台线程中运行
+    （安装了 pypinyin 时还要计算拼音，数十万人需要数秒）；cancelled() 返回 True 时提前返回 None。
+    """
+    index = SearchIndex()
+    for entry_id, name in entries:
+        if cancelled is not None and cancelled():
+            return None
+        index.add(entry_id, name)
+    return index
+
+
+class SearchIndex:
+    """
+    名单搜索索引：每个单字和相邻两字对应一个编号数组（倒排表），另存每个编号的检索串。
+    查询时取查询串中最少见的两字组合（单字查询取该字）的倒排表作为候选，再核对候选是否包含整个查询串，
+    常见的姓名查询只需核对几百到几千个候选；纯数字的查询同时按编号精确查找。
+    名单增删改时增量更新：新增和改名只追加倒排项，删除和改名留下的旧项在核对时过滤，
+    旧项多于有效条目时才用已保存的检索串重建倒排表（不重新计算拼音）。
+    """
+
+    def __init__(self, entries=()):
+        self.texts = {}  # 编号 -> 检索串
+        self.postings = {}  # 单字或两字 -> array('q') 编号
+        self.stale = 0  # 倒排表中已失效的项数（估计值）
+        for entry_id, name in entries:
+            self.add(entry_id, name)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def post(self, entry_id, text):
+        postings = self.postings
+        for gram in grams(text):
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = posting = array('q')
+            posting.append(entry_id)
+
+    def add(self, entry_id, name):
+        text = search_text(name)
+        self.texts[entry_id] = text
+        self.post(entry_id, text)
+
+    def rename(self, entry_id, new_name):
+        old = self.texts.get(entry_id)
+        text = search_text(new_name)
+        self.texts[entry_id] = text
+        if old is not None:
+            # 新旧姓名共有的单字和两字已在倒排表中，只追加新出现的
+            new_grams = grams(text) - grams(old)
+            for gram in new_grams:
+                self.postings.setdefault(gram, array('q')).append(entry_id)
+            self.stale += 1
+            self.compact()
+        else:
+            self.post(entry_id, text)
+
+    def remove(self, entry_id):
+        if self.texts.pop(entry_id, None) is not None:
+            self.stale += 1
+            self.compact()
+
+    def renumber(self, mapping):
+        """名单重新编号后按 {旧编号: 新编号} 改写检索串和倒排表，不重新计算拼音；已失效的倒排项改为 -1"""
+        self.texts = {mapping[entry_id]: text for entry_id, text in self.texts.items() if entry_id in mapping}
+        missing = repeat(-1)
+        self.postings = {gram: array('q', map(mapping.get, posting, missing)) for gram, posting in self.postings.items()}
+
+    def compact(self):
+        if self.stale > max(len(self.texts), 1000):
+            self.rebuild()
+
+    def rebuild(self):
+        self.postings = {}
+        self.stale = 0
+        for entry_id, text in self.texts.items():
+            self.post(entry_id, text)
+
+    def search(self, query):
+        """返回姓名（或拼音）包含 query 的编号列表，按加入索引的顺序；编号完全相同的条目排在最前"""
+        query = query.strip().casefold()
+        if not query:
+            return []
+        results = []
+        exact = int(query) if query.isdigit() else None
+        if exact is not None and exact in self.texts:
+            results.append(exact)
+        keys = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+        candidates = None
+        for key in keys:
+            posting = self.postings.get(key)
+            if posting is None:
+                return results
+            if candidates is None or len(posting) < len(candidates):
+                candidates = posting
+        texts = self.texts
+        seen = set(results)
+        for entry_id in candidates:
+            text = texts.get(entry_id)
+            if text is not None and query in text and entry_id not in seen:
+                seen.add(entry_id)
+                results.append(entry_id)
+        return results
@@ -0,0 +1,75 @@
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from participant_store import ParticipantStore
+from draw_engine import DrawEngine, LazyShuffle
+
+
+def make_store(count=50, weights=None):
+    store = ParticipantStore()
+    for i in range(count):
+        store.add(f"员工{i}", None, (weights or {}).get(i + 1, 1))
+    return store
+
+
+def test_engine_shares_store_columns():
+    store = make_store()
+    engine = DrawEngine(store, random.Random(1))
+    assert engine.ids is store.id_column and engine.name_data is store.name_data
+    assert len(engine) == 50 and 7 in engine
+
+
+def test_draw_many_without_repeats():
+    store = make_store()
+    engine = DrawEngine(store, random.Random(1))
+    drawn = engine.draw_many(60)
+    assert sorted(drawn) == sorted(store)
+    assert not engine and engine.draw() is None
+    assert engine.pop_winners() == drawn and engine.winners == []
+
+
+def test_store_changes_during_segment():
+    """抽奖期间名单移除中奖者、压缩或在末尾添加，引擎的行号和姓名都不受影响"""
+    store = make_store()
+    engine = DrawEngine(store, random.Random(2))
+    winners = engine.draw_many(10)
+    store.remove_many([entry[0] for entry in winners])
+    store.compact()
+    assert store.id_column is not engine.ids
+    store.add('新人')
+    assert 51 not in engine
+    left = [entry for entry in list(store) if entry[0] != 51]
+    assert sorted(engine) == sorted(left)
+    assert engine.remove(left[0][0]) == left[0]
+    assert left[0][0] not in engine
+    assert sorted(engine.draw_many(100)) == sorted(left[1:])
+
+
+def test_same_draws_after_removals():
+    """名单中有删除留下的空行时，与从同样内容的新名单建的引擎（校验时的做法）抽出的顺序相同"""
+    weights = {i: i % 4 + 0.5 for i in range(1, 201)}
+    store = make_store(200, weights)
+    store.remove_many(range(1, 200, 3))
+    fresh = ParticipantStore(list(store.rows()))
+    drawn = DrawEngine(store, random.Random('s'), store.weights).draw_many(50)
+    assert drawn == DrawEngine(fresh, random.Random('s'), fresh.weights).draw_many(50)
+
+
+def test_weighted_draw_skips_zero_weight():
+    store = make_store(20, {1: 0, 2: 0, 3: 5})
+    engine = DrawEngine(store, random.Random(3), store.weights)
+    drawn = engine.draw_many(20)
+    assert len(drawn) == 18 and {1, 2}.isdisjoint(entry[0] for entry in drawn)
+
+
+def test_lazy_shuffle_cycles_through_pool():
+    store = make_store(37)
+    engine = DrawEngine(store, random.Random(4))
+    shuffle = LazyShuffle(engine, random.Random(5))
+    seen = [shuffle.next() for _ in range(37)]  # 一轮内每人恰好出现一次
+    assert sorted(seen) == sorted(engine)
+    engine.draw_many(37)
+    assert shuffle.next() is None
@@ -0,0 +1,180 @@
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from participant_store import ParticipantStore
+from draw_service import DrawService, DisplayClient, Subscriber, encode_message, request
+
+
+def make_service(count=10, prizes=None):
+    store = ParticipantStore()
+    for i in range(count):
+        store.add(f"员工{i}")
+    if prizes is None:
+        prizes = [{'name': '一等奖', 'count': 2}, {'name': '二等奖', 'count': 3}]
+    return DrawService(store, prizes, seed='test', interval=0.005)
+
+
+def run(test):
+    """启动服务，运行 test(service, port)，最后停止服务"""
+    async def main():
+        service = make_service()
+        port = await service.start(port=0)
+        try:
+            return await test(service, port)
+        finally:
+            await service.stop()
+    return asyncio.run(asyncio.wait_for(main(), 10))
+
+
+async def receive(client, kind):
+    """跳过其他消息，返回下一条 type 为 kind 的消息"""
+    while True:
+        message = await client.receive()
+        if message['type'] == kind:
+            return message
+
+
+async def raw_request(port, data):
+    """发送原始字节，返回响应的状态码"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ')[1])
+
+
+def test_add():
+    async def test(service, port):
+        status, result = await request('POST', '/add', {'name': '新人', 'weight': 3}, port=port)
+        assert status == 200
+        assert service.store.get(result['id']) == '新人'
+        assert service.store.weight(result['id']) == 3
+        status, result = await request('GET', '/status', port=port)
+        assert result['participants'] == 11
+    run(test)
+
+
+@pytest.mark.parametrize('body', [{'name': '员工1'}, {'name': '  '}, {'name': '甲', 'weight': -1}, {'name': '乙', 'weight': 'x'}])
+def test_add_rejected(body):
+    async def test(service, port):
+        status, result = await request('POST', '/add', body, port=port)
+        assert status == 400 and result['error']
+        assert len(service.store) == 10
+    run(test)
+
+
+def test_draw_pushes_winners():
+    async def test(service, port):
+        client = await DisplayClient.connect(port=port)
+        status, result = await request('POST', '/draw', {'count': 5}, port=port)
+        assert status == 200
+        assert result['prize'] == '一等奖' and len(result['winners']) == 2  # 不超过奖项剩余名额
+        message = await receive(client, 'winners')
+        assert message == result
+        assert len(service.store) == 8
+        assert [entry[0] for entry in service.winners] == ['一等奖', '一等奖']
+        status, result = await request('POST', '/draw', {'count': 'all'}, port=port)
+        assert result['prize'] == '二等奖' and len(result['winners']) == 3
+        status, result = await request('POST', '/draw', port=port)
+        assert status == 400  # 奖品已抽完
+        await client.close()
+    run(test)
+
+
+@pytest.mark.parametrize('count', [0, -1, 'x', True, None, 1.5])
+def test_draw_bad_count(count):
+    async def test(service, port):
+        status, result = await request('POST', '/draw', {'count': count}, port=port)
+        assert status == 400
+        assert not service.winners
+    run(test)
+
+
+def test_rolling_frames_fan_out():
+    async def test(service, port):
+        clients = [await DisplayClient.connect(port=port) for _ in range(3)]
+        await request('POST', '/rolling', {'on': True}, port=port)
+        for client in clients:
+            frame = await receive(client, 'frame')
+            assert service.store.get(frame['id']) == frame['name']
+        # 添加条目结束了当前这一段，滚动应按新名单继续
+        await request('POST', '/add', {'name': '新人'}, port=port)
+        for client in clients:
+            await receive(client, 'status')
+            await receive(client, 'frame')
+        status, result = await request('POST', '/rolling', {'on': False}, port=port)
+        assert result['rolling'] is False
+        for client in clients:
+            await client.close()
+    run(test)
+
+
+@pytest.mark.parametrize('data', [
+    b'GARBAGE\r\n\r\n',
+    b'GET /status\r\n\r\n',
+    b'GET /ws HTTP/1.1\r\nUpgrade: websocket\r\n\r\n',
+    b'POST /add HTTP/1.1\r\nContent-Length: 5\r\n\r\n{oops',
+    b'POST /add HTTP/1.1\r\nContent-Length: 2\r\n\r\n[]',
+    b'POST /draw HTTP/1.1\r\nContent-Length: 2\r\n\r\n\xff\xfe',
+])
+def test_bad_request(data):
+    async def test(service, port):
+        assert await raw_request(port, data) == 400
+    run(test)
+
+
+def test_unknown_path():
+    async def test(service, port):
+        status, result = await request('GET', '/nothing', port=port)
+        assert status == 404
+    run(test)
+
+
+def test_stop_closes_displays():
+    async def main():
+        tasks = asyncio.all_tasks()
+        service = make_service()
+        port = await service.start(port=0)
+        clients = [await DisplayClient.connect(port=port) for _ in range(2)]
+        service.set_rolling(True)
+        for client in clients:
+            await receive(client, 'frame')
+        await service.stop()
+        for client in clients:
+            with pytest.raises((ConnectionError, asyncio.IncompleteReadError)):
+                while True:
+                    await client.receive()
+        assert service.rolling_task is None
+        assert asyncio.all_tasks() == tasks  # 读取、发送和滚动任务都已结束
+        with pytest.raises(OSError):
+            await asyncio.open_connection('127.0.0.1', port)
+    asyncio.run(asyncio.wait_for(main(), 10))
+
+
+class FakeWriter:
+    def is_closing(self):
+        return False
+
+
+def test_subscriber_keeps_messages_and_latest_frame():
+    async def main():
+        subscriber = Subscriber(FakeWriter())
+        for i in range(100):
+            subscriber.offer(encode_message({'type': 'frame', 'id': i}), droppable=True)
+        subscriber.offer(encode_message({'type': 'winners', 'id': 1}))
+        for i in range(100, 200):
+            subscriber.offer(encode_message({'type': 'frame', 'id': i}), droppable=True)
+        subscriber.offer(encode_message({'type': 'status'}))
+        subscriber.offer(encode_message({'type': 'frame', 'id': 200}), droppable=True)
+        sent = [await subscriber.next() for _ in range(3)]
+        assert sent == [encode_message({'type': 'winners', 'id': 1}), encode_message({'type': 'status'}),
+                        encode_message({'type': 'frame', 'id': 200})]
+        assert subscriber.dropped == 200
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(subscriber.next(), 0.01)
+    asyncio.run(main())
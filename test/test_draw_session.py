@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from participant_store import ParticipantStore
+from draw_session import DrawSession, create_files, verify_log, LOG_SUFFIX, ROSTER_SUFFIX
+
+
+def make_store(count=30):
+    store = ParticipantStore()
+    for i in range(count):
+        store.add(f"员工{i}", None, 2.5 if i % 7 == 0 else 1)
+    return store
+
+
+def test_create_files_never_overwrites(tmp_path):
+    stem = str(tmp_path / 'session')
+    (tmp_path / ('session_1' + ROSTER_SUFFIX)).write_text('孤立的快照', encoding='utf-8')
+    opened = [create_files(stem) for _ in range(3)]
+    names = [os.path.basename(log.name) for log, roster in opened]
+    assert names == ['session' + LOG_SUFFIX, 'session_2' + LOG_SUFFIX, 'session_3' + LOG_SUFFIX]
+    assert not (tmp_path / ('session_1' + LOG_SUFFIX)).exists()
+    assert (tmp_path / ('session_1' + ROSTER_SUFFIX)).read_text(encoding='utf-8') == '孤立的快照'
+    for files in opened:
+        for f in files:
+            f.close()
+
+
+def test_verify_log(tmp_path):
+    store = make_store()
+    sessions = [DrawSession(store, 'seed', str(tmp_path), segment) for segment in range(2)]
+    for session in sessions:
+        session.draw_many(10, prize=0)
+        session.draw(prize=1)
+        session.close()
+    assert sessions[0].log_path != sessions[1].log_path  # 同一秒开始的两段不会互相覆盖
+    for session in sessions:
+        assert verify_log(session.log_path) == (True, 11, "全部一致")
+
+
+def test_verify_log_detects_tampering(tmp_path):
+    session = DrawSession(make_store(), 'seed', str(tmp_path))
+    session.draw_many(5)
+    session.close()
+    with open(session.log_path, encoding='utf-8') as f:
+        lines = f.readlines()
+    counter, prize, pool_size, winner_id = lines[3].split('\t')
+    lines[3] = '\t'.join([counter, prize, pool_size, '999\n'])
+    with open(session.log_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    ok, checked, message = verify_log(session.log_path)
+    assert not ok and checked == 2
+    with open(session.roster_path, 'a', encoding='utf-8') as f:
+        f.write('1000,混入的人,1\n')
+    assert verify_log(session.log_path) == (False, 0, "名单快照与日志记录的指纹不一致")
@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from duplicates import canonical_name, find_suspects, describe
+
+pytest.importorskip('numpy')
+
+
+def groups(suspects, reason):
+    return sorted(sorted(entry_id for entry_id, name in group) for kind, group in suspects if kind == reason)
+
+
+def test_canonical_name():
+    assert canonical_name('張 三') == canonical_name('张三')
+    assert canonical_name('ＡＢＣ') == canonical_name('abc')
+    assert canonical_name('Jean-Luc') == canonical_name('jean luc')
+
+
+def test_find_suspects():
+    entries = [(1, '张三'), (2, '張三'), (3, '张 三'), (4, '李四'), (5, '李五'),
+               (6, 'Christopher Johnson'), (7, 'Christopher Jonson'), (8, 'Elizabeth Smith'),
+               (9, '员工0001'), (10, '员工0002')]
+    suspects = find_suspects(entries)
+    assert groups(suspects, 'same') == [[1, 2, 3]]
+    assert groups(suspects, 'similar') == [[6, 7]]  # 短的中文名差一个字、编号不同的都不算
+    assert describe(suspects).splitlines()[0] == '规范化后相同：1 张三、2 張三、3 张 三'
+
+
+def test_no_suspects_and_cancel():
+    entries = [(i, f"员工{i:04d}") for i in range(500)]
+    assert find_suspects(entries) == []
+    assert find_suspects(entries, cancelled=lambda: True) is None
@@ -0,0 +1,46 @@
+import os
+import sys
+import csv
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import exporter
+from exporter import Exporter, ExportCancelled, winners_path
+
+WINNERS = [('一等奖', 1, '员工1')]
+
+
+def entries(count):
+    return [(i, f"员工{i}", 1) for i in range(1, count + 1)]
+
+
+def test_export_jsonl(tmp_path):
+    path = str(tmp_path / 'out.jsonl')
+    assert Exporter(path, entries(3), WINNERS, 3).run() == 4
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [record['type'] for record in records] == ['entry'] * 3 + ['winner']
+    assert os.listdir(tmp_path) == ['out.jsonl']
+
+
+def test_cancelled_export_keeps_old_file(tmp_path, monkeypatch):
+    """取消时（例如导出中途退出程序）不留下写了一半的文件，已有的同名文件保持原样"""
+    monkeypatch.setattr(exporter, 'PROGRESS_EVERY', 2)
+    path = tmp_path / 'out.csv'
+    path.write_text('旧文件', encoding='utf-8')
+    with pytest.raises(ExportCancelled):
+        Exporter(str(path), entries(10), WINNERS, 10).run(cancelled=lambda: True)
+    assert path.read_text(encoding='utf-8') == '旧文件'
+    assert os.listdir(tmp_path) == ['out.csv']
+
+
+def test_failed_export_removes_parts(tmp_path):
+    """CSV 的名单文件已写完、中奖名单写到一半出错时，两个文件都不替换"""
+    path = str(tmp_path / 'out.csv')
+    with pytest.raises(csv.Error):
+        Exporter(path, entries(3), [object()], 3).run()
+    assert os.listdir(tmp_path) == []
+    Exporter(path, entries(3), WINNERS, 3).run()
+    assert sorted(os.listdir(tmp_path)) == sorted(['out.csv', os.path.basename(winners_path(path))])
@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fairness import FairnessSimulation, pick_sequence
+from prize_scheduler import INTERLEAVED
+
+np = pytest.importorskip('numpy')
+
+PRIZES = [{'name': '一等奖', 'count': 1}, {'name': '二等奖', 'count': 2}]
+
+
+def test_pick_sequence():
+    assert pick_sequence(PRIZES) == [0, 1, 1]
+    assert pick_sequence(PRIZES, INTERLEAVED) == [0, 1, 1]
+    assert PRIZES[1]['count'] == 2  # 不修改传入的奖品列表
+
+
+def test_uniform_probabilities():
+    rows = [(i, f"员工{i}", 1) for i in range(1, 11)]
+    simulation = FairnessSimulation(rows, PRIZES, seed='s')
+    counts = simulation.run(20000, workers=1)
+    assert counts.sum(axis=1).tolist() == [20000, 40000]  # 每场恰好抽出奖品数量的人
+    per_tier, total = simulation.probabilities()
+    assert np.allclose(total, 0.3, atol=0.02)
+    assert np.allclose(per_tier[0], 0.1, atol=0.01)
+
+
+def test_weights_and_zero_weight():
+    rows = [(1, '甲', 3), (2, '乙', 1), (3, '丙', 0)]
+    simulation = FairnessSimulation(rows, [{'name': '奖', 'count': 2}], seed=1)
+    simulation.run(20000, workers=1)
+    per_tier, total = simulation.probabilities()
+    assert total[2] == 0
+    assert total[0] == total[1] == 1  # 只有两人可抽，两份奖品都归他们
+    simulation = FairnessSimulation(rows, [{'name': '奖', 'count': 1}], seed=1)
+    simulation.run(20000, workers=1)
+    assert np.allclose(simulation.probabilities()[1], [0.75, 0.25, 0], atol=0.02)
+
+
+def test_same_seed_same_result():
+    rows = [(i, f"员工{i}", i % 3 + 1) for i in range(1, 31)]
+    first = FairnessSimulation(rows, PRIZES, seed='固定').run(15000, workers=1)
+    second = FairnessSimulation(rows, PRIZES, seed='固定').run(15000, workers=2)
+    assert (first == second).all()  # 结果与进程数无关
+
+
+def test_rejects_empty_input():
+    with pytest.raises(ValueError):
+        FairnessSimulation([], PRIZES)
+    with pytest.raises(ValueError):
+        FairnessSimulation([(1, '甲', 1)], [{'name': '奖', 'count': 0}])
+    with pytest.raises(ValueError):
+        FairnessSimulation([(1, '甲', 1)], PRIZES).run(0)
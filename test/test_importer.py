@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from importer import RosterImporter, RosterSync
+
+
+def write_csv(path, count):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write('编号,姓名,权重\n')
+        for i in range(1, count + 1):
+            f.write(f"{i},员工{i},{i % 3 + 1}\n")
+
+
+def test_import_csv(tmp_path):
+    path = str(tmp_path / 'roster.csv')
+    write_csv(path, 10)
+    importer = RosterImporter(path)
+    store = importer.run()
+    assert importer.added == 10 and importer.has_weights
+    assert store.get(3) == '员工3' and store.weight(3) == 1
+
+
+def test_csv_progress_estimates_total(tmp_path):
+    """csv 不知道总行数，按读到的字节位置估计；进度条不会一开始就走满，最后一块正好走满"""
+    path = str(tmp_path / 'roster.csv')
+    write_csv(path, 50000)
+    reports = []
+    RosterImporter(path, chunk_size=5000).run(progress=lambda done, total: reports.append((done, total)))
+    done, total = reports[0]
+    assert done == 4999 and 45000 < total < 55000
+    assert all(done <= total for done, total in reports)  # 读到文件末尾前估计值不小于已读行数
+    assert reports[-1] == (50000, 50000)
+
+
+def test_sync_diff(tmp_path):
+    path = tmp_path / 'roster.csv'
+    path.write_text('编号,姓名,权重\n1,张三,1\n2,李四（新）,1\n,王五,2\n,新人,1\n4,已中奖,1\n', encoding='utf-8-sig')
+    current = [(1, '张三', 1), (2, '李四', 1), (3, '王五', 1), (5, '离职', 1)]
+    sync = RosterSync(str(path), current, winners=[(4, '已中奖')])
+    diff = sync.run()
+    assert diff.inserts == [(None, '新人', 1)]
+    assert diff.renames == {2: '李四（新）'}
+    assert diff.weights == {3: 2}  # 没有编号的行按姓名对应
+    assert diff.deletes == [5] and diff.unchanged == 1
+    assert sync.won == 1
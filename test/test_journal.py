@@ -0,0 +1,187 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from participant_store import ParticipantStore
+from data_management import DataManager, SqliteBackend
+from journal import Journal
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))  # 旧版 prizes.json、settings.json 的位置
+    return tmp_path
+
+
+def open_manager(data_dir):
+    return DataManager(SqliteBackend(str(data_dir / 'data.db')), Journal(str(data_dir / 'journal.log')))
+
+
+def crash(manager):
+    """模拟崩溃：不保存快照、不关闭日志，只丢掉打开的文件"""
+    manager.writer.flush()
+    if manager.journal.file is not None:
+        manager.journal.file.close()
+        manager.journal.file = None
+
+
+def reload(data_dir):
+    """与启动时相同：读取快照、奖品，再重放日志"""
+    manager = open_manager(data_dir)
+    store, prizes, winners = manager.load(manager.load_prizes())
+    return manager, store, prizes, winners
+
+
+def start(data_dir, count=6):
+    manager = open_manager(data_dir)
+    store = ParticipantStore()
+    for i in range(count):
+        store.add(f"员工{i}")
+    prizes = [{'name': '一等奖', 'count': 2}, {'name': '二等奖', 'count': 5}]
+    winners = []
+    manager.checkpoint(store, prizes, winners)
+    return manager, store, prizes, winners
+
+
+def draw(manager, store, prizes, winners, entry_id, prize):
+    entry = store.remove(entry_id)
+    prizes[prize]['count'] -= 1
+    winners.append((prizes[prize]['name'], entry[0], entry[1]))
+    manager.record('draw', id=entry_id, prize=prize)
+
+
+def assert_same(data_dir, store, prizes, winners):
+    manager, loaded, loaded_prizes, loaded_winners = reload(data_dir)
+    assert list(loaded.rows()) == list(store.rows())
+    assert loaded_winners == winners
+    assert loaded_prizes == prizes
+    manager.close()
+
+
+def test_replay_every_operation(data_dir):
+    manager, store, prizes, winners = start(data_dir)
+    entry_id = store.add('新人', None, 3)
+    manager.record('add', id=entry_id, name='新人', weight=3)
+    store.remove(2)
+    manager.record('delete', id=2)
+    store.remove_many([3, 4])
+    manager.record('delete', ids=[3, 4])
+    store.rename(1, '改名甲')
+    manager.record('rename', id=1, name='改名甲')
+    store.rename_many({5: '改名乙', 6: '改名丙'})
+    manager.record('rename', names=[[5, '改名乙'], [6, '改名丙']])
+    store.set_weights({5: 2})
+    manager.record('weight', weights=[[5, 2]])
+    prizes.append({'name': '三等奖', 'count': 1})
+    manager.record('prizes', prizes=[dict(prize) for prize in prizes])
+    draw(manager, store, prizes, winners, 1, 0)
+    draw(manager, store, prizes, winners, entry_id, 2)
+    crash(manager)
+    assert_same(data_dir, store, prizes, winners)
+
+
+def test_replay_after_checkpoint_interrupted(data_dir):
+    """快照已写入、日志还没清空时中断：日志不能再应用一遍，已抽走的奖品数量不能恢复"""
+    manager, store, prizes, winners = start(data_dir)
+    prizes[1]['count'] = 4
+    manager.record('prizes', prizes=[dict(prize) for prize in prizes])
+    draw(manager, store, prizes, winners, 1, 1)
+    store.add('新人', 7)
+    manager.record('add', id=7, name='新人')
+    store.remove(7)
+    manager.record('delete', id=7)
+
+    def interrupted():
+        raise OSError("中断")
+    manager.journal.reset = interrupted
+    manager.checkpoint(store, prizes, winners)
+    crash(manager)
+    assert_same(data_dir, store, prizes, winners)
+    # 跳过的日志已清空，之后的记录照常重放
+    manager, store, prizes, winners = reload(data_dir)
+    draw(manager, store, prizes, winners, 2, 0)
+    crash(manager)
+    assert_same(data_dir, store, prizes, winners)
+
+
+def test_torn_last_record_is_ignored(data_dir):
+    manager, store, prizes, winners = start(data_dir)
+    draw(manager, store, prizes, winners, 3, 0)
+    crash(manager)
+    with open(data_dir / 'journal.log', 'a', encoding='utf-8') as f:
+        f.write('{"op":"draw","id":4,')
+    assert_same(data_dir, store, prizes, winners)
+
+
+def test_legacy_journal_without_token(data_dir):
+    """旧版本写的日志没有标识行，也照常重放"""
+    manager, store, prizes, winners = start(data_dir)
+    manager.close()
+    with open(data_dir / 'journal.log', 'w', encoding='utf-8') as f:
+        f.write('{"op":"draw","id":1,"prize":0}\n')
+    draw(open_manager(data_dir), store, prizes, winners, 1, 0)
+    assert_same(data_dir, store, prizes, winners)
+
+
+def test_sync_after_last_append(tmp_path):
+    journal = Journal(str(tmp_path / 'journal.log'), sync_interval=0.05)
+    journal.append('add', id=1, name='甲')
+    journal.append('add', id=2, name='乙')  # 距离上次 fsync 不到 sync_interval，由定时器补上
+    assert journal.timer is not None
+    deadline = time.monotonic() + 5
+    while journal.timer is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert journal.timer is None
+    journal.close()
+
+
+def renumber(manager, store):
+    """与主窗口相同：重新编号并记下重新编号前的摘要"""
+    before = store.fingerprint()
+    mapping = store.renumber(1)
+    manager.record('renumber', start=1, before=before)
+    return mapping
+
+
+def test_replay_renumber(data_dir):
+    manager, store, prizes, winners = start(data_dir)
+    store.remove_many([2, 4])
+    manager.record('delete', ids=[2, 4])
+    renumber(manager, store)
+    store.rename(1, '改名')
+    manager.record('rename', id=1, name='改名')
+    crash(manager)
+    assert [entry[0] for entry in store] == [1, 2, 3, 4]
+    assert_same(data_dir, store, prizes, winners)
+
+
+def test_renumber_checkpoint_then_crash(data_dir):
+    """与主窗口相同，重新编号后保存快照；之后的记录用新编号，崩溃后照常重放"""
+    manager, store, prizes, winners = start(data_dir)
+    store.rename(5, '旧编号5')
+    manager.record('rename', id=5, name='旧编号5')
+    draw(manager, store, prizes, winners, 1, 0)
+    renumber(manager, store)
+    manager.checkpoint(store, prizes, winners)
+    draw(manager, store, prizes, winners, 4, 0)  # 新编号 4 是原来的 5
+    crash(manager)
+    assert winners[-1] == ('一等奖', 4, '旧编号5')
+    assert_same(data_dir, store, prizes, winners)
+
+
+def test_renumber_interrupted_checkpoint(data_dir):
+    """重新编号前的记录用的是旧编号，快照已写入、日志未清空时不能重放到重新编号后的快照上"""
+    manager, store, prizes, winners = start(data_dir)
+    store.remove(1)
+    manager.record('delete', id=1)
+    renumber(manager, store)
+
+    def interrupted():
+        raise OSError("中断")
+    manager.journal.reset = interrupted
+    manager.checkpoint(store, prizes, winners)
+    crash(manager)
+    assert_same(data_dir, store, prizes, winners)
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from participant_store import ParticipantStore
+
+
+def make_store():
+    store = ParticipantStore()
+    store.add('张三', 1)
+    store.add('李四', 2)
+    return store
+
+
+def test_rename():
+    store = make_store()
+    assert store.rename(1, '张三丰')
+    assert store.get(1) == '张三丰'
+    assert store.find('张三丰') == 1
+    assert store.find('张三') is None
+
+
+def test_rename_taken_name():
+    store = make_store()
+    assert not store.rename(1, '李四')
+    assert store.get(1) == '张三'
+
+
+def test_rename_missing_id():
+    """编号不存在时与 add、remove 一样返回 False，名单不变"""
+    store = make_store()
+    assert store.rename(99, '王五') is False
+    assert store.rename(99, '张三') is False
+    assert store.find('王五') is None
+    assert list(store) == [(1, '张三'), (2, '李四')]
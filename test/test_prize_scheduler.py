@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from prize_scheduler import PrizeScheduler, ORDERED, REVERSE, INTERLEAVED
+
+
+def make_prizes():
+    return [{'name': '一等奖', 'count': 1}, {'name': '二等奖', 'count': 0}, {'name': '三等奖', 'count': 3}]
+
+
+def run(scheduler):
+    """按 step() 一直抽到结束，返回依次抽取的 (奖项下标, 人数)"""
+    steps = []
+    while scheduler:
+        index, count = scheduler.step()
+        steps.append((index, count))
+        scheduler.record(index, count)
+    return steps
+
+
+@pytest.mark.parametrize('schedule, steps', [
+    (ORDERED, [(0, 1), (2, 3)]),
+    (REVERSE, [(2, 3), (0, 1)]),
+    (INTERLEAVED, [(0, 1), (2, 1), (2, 1), (2, 1)]),
+])
+def test_schedules(schedule, steps):
+    prizes = make_prizes()
+    scheduler = PrizeScheduler(prizes, schedule)
+    assert run(scheduler) == steps
+    assert all(prize['count'] == 0 for prize in prizes)
+    assert scheduler.step() is None and scheduler.current() is None
+
+
+def test_partial_draw_keeps_prize_current():
+    prizes = make_prizes()
+    scheduler = PrizeScheduler(prizes)
+    assert scheduler.record(0, 1) is True
+    assert scheduler.record(2, 2) is False  # 候选人不够时只抽出一部分，奖项仍是当前奖项
+    assert scheduler.step() == (2, 1) and len(scheduler) == 1
+
+
+def test_plan_and_errors():
+    scheduler = PrizeScheduler(make_prizes(), REVERSE)
+    assert scheduler.plan() == [(2, 3), (0, 1)]
+    assert scheduler.plan(1) == [(2, 3)]
+    with pytest.raises(ValueError):
+        scheduler.record(0, 1)
+    with pytest.raises(ValueError):
+        PrizeScheduler(make_prizes(), 'random')
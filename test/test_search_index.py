@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex, build_index
+
+ENTRIES = [(1, '张三'), (2, '李四'), (3, 'Alice Zhang'), (12, '张三丰'), (21, '王五')]
+
+
+def test_search():
+    index = SearchIndex(ENTRIES)
+    assert index.search('张三') == [1, 12]
+    assert index.search(' ALICE ') == [3]  # 忽略大小写和首尾空白
+    assert index.search('三丰') == [12]
+    assert index.search('12') == [12]  # 编号精确匹配
+    assert index.search('赵') == [] and index.search('') == []
+
+
+def test_updates():
+    index = SearchIndex(ENTRIES)
+    index.rename(1, '赵六')
+    assert index.search('张三') == [12] and index.search('赵六') == [1]
+    index.remove(12)
+    assert index.search('张') == []
+    index.add(30, '张三')
+    assert index.search('张三') == [30]
+    index.renumber({1: 1, 2: 2, 3: 3, 21: 4, 30: 5})
+    assert index.search('张三') == [5] and index.search('王五') == [4]
+    assert len(index) == 5
+
+
+def test_rebuild_after_many_renames():
+    index = SearchIndex((i, f"员工{i}") for i in range(1, 11))
+    for round in range(120):
+        for i in range(1, 11):
+            index.rename(i, f"员工{i}-{round}")
+    assert index.stale <= 1000  # 旧项多了会自动重建倒排表
+    assert index.search('员工3-119') == [3]
+    assert index.search('-118') == []
+
+
+def test_build_index_cancel():
+    assert build_index(ENTRIES).search('李四') == [2]
+    assert build_index(ENTRIES, cancelled=lambda: True) is None
@@ -0,0 +1,46 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+QtCore = pytest.importorskip('PyQt5.QtCore')
+from worker import Worker
+
+app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def run(worker):
+    """启动并等待后台线程结束，再处理排队的信号，返回收到的 [(信号, 参数)]"""
+    received = []
+    worker.progress.connect(lambda done, total: received.append(('progress', (done, total))))
+    worker.succeeded.connect(lambda result: received.append(('succeeded', result)))
+    worker.failed.connect(lambda message: received.append(('failed', message)))
+    worker.start()
+    assert worker.wait(5000)
+    app.processEvents()
+    return received
+
+
+def test_result_and_progress():
+    def task(progress, cancelled):
+        progress(1, 2)
+        progress(2, 2)
+        return 'done'
+    assert run(Worker(task)) == [('progress', (1, 2)), ('progress', (2, 2)), ('succeeded', 'done')]
+
+
+def test_failure_message():
+    def task(progress, cancelled):
+        raise ValueError('坏文件')
+    assert run(Worker(task)) == [('failed', '坏文件')]
+
+
+def test_cancelled_task_emits_nothing():
+    def task(progress, cancelled):
+        worker.cancel()  # 相当于界面线程中途点了取消
+        if cancelled():
+            raise RuntimeError('已取消')
+    worker = Worker(task)
+    assert run(worker) == []
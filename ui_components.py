@@ -1,6 +1,8 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QListWidget, QScrollArea, QFileDialog, QInputDialog, QMenuBar, QMenu, QSizePolicy
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QTableView, QAbstractItemView, QHeaderView, QFileDialog, QInputDialog, QMenuBar, QMenu, QSizePolicy
 from PyQt5.QtCore import Qt
 
+SEARCH_PLACEHOLDER = "搜索编号、姓名或拼音首字母"
+
 class CustomLineEdit(QLineEdit):
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Return or event.key() == Qt.Key_Enter:
@@ -12,14 +14,23 @@ def create_menu_bar(parent):
     menubar = QMenuBar(parent)
     file_menu = menubar.addMenu('文件')
     file_menu.addAction('导入 Excel', parent.import_excel)
+    file_menu.addAction('同步名单', parent.sync_roster)
     file_menu.addAction('导出 Excel', parent.export_excel)
+    file_menu.addAction('导出新增中奖名单', parent.export_new_winners)
     file_menu.addAction('退出', parent.exit_program)
     
+    roster_menu = menubar.addMenu('名单')
+    roster_menu.addAction('删除筛选结果', parent.delete_filtered)
+    roster_menu.addAction('批量改名', parent.rename_from_file)
+    roster_menu.addAction('重新编号', parent.renumber_entries)
+
     prize_menu = menubar.addMenu('奖品管理')
     prize_menu.addAction('添加奖品', parent.add_prize)
     prize_menu.addAction('查看奖品', parent.view_prizes)
     prize_menu.addAction('修改奖品', parent.modify_prize)
     prize_menu.addAction('删除奖品', parent.delete_prize)
+    prize_menu.addAction('抽奖种子', parent.set_draw_seed)
+    prize_menu.addAction('抽奖顺序', parent.set_prize_schedule)
     return menubar
 
 def setup_main_ui(parent):
@@ -49,33 +60,31 @@ def setup_main_ui(parent):
     button_layout.addWidget(parent.save_button)
     layout.addLayout(button_layout)
 
-    parent.listbox = QListWidget(parent)
-    parent.listbox.setSelectionMode(QListWidget.ExtendedSelection)
-    parent.listbox.itemClicked.connect(parent.on_select)
+    search_layout = QHBoxLayout()
+    search_layout.addWidget(QLabel("搜索", parent))
+    parent.search_entry = QLineEdit(parent)
+    parent.search_entry.setPlaceholderText(SEARCH_PLACEHOLDER)
+    parent.search_entry.setClearButtonEnabled(True)
+    parent.search_entry.textChanged.connect(parent.filter_entries)
+    parent.search_entry.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+    search_layout.addWidget(parent.search_entry)
+    layout.addLayout(search_layout)
+
+    # 名单表格由 EntryModel 提供数据，滚动时按需加载，无需手动分页；输入搜索内容时换成 EntryFilterModel
+    parent.listbox = QTableView(parent)
+    parent.listbox.setSelectionBehavior(QAbstractItemView.SelectRows)
+    parent.listbox.setSelectionMode(QAbstractItemView.ExtendedSelection)
+    parent.listbox.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    parent.listbox.verticalHeader().hide()
+    parent.listbox.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+    parent.listbox.horizontalHeader().setStretchLastSection(True)
+    parent.listbox.clicked.connect(parent.on_select)
     parent.listbox.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-    scroll = QScrollArea()
-    scroll.setWidgetResizable(True)
-    scroll.setWidget(parent.listbox)
-    layout.addWidget(scroll)
-    layout.setStretchFactor(scroll, 1)
+    layout.addWidget(parent.listbox)
+    layout.setStretchFactor(parent.listbox, 1)
 
-    page_layout = QHBoxLayout()
-    parent.page_label = QLabel(f"当前页: 1 / 1", parent)
-    page_layout.addWidget(parent.page_label)
-    page_layout.addWidget(QLabel("每页显示:", parent))
-    parent.entries_per_page_entry = QLineEdit("10", parent)
-    parent.entries_per_page_entry.returnPressed.connect(parent.update_entries_per_page)
-    page_layout.addWidget(parent.entries_per_page_entry)
-    parent.entries_per_page_button = QPushButton("设置", parent)
-    parent.entries_per_page_button.clicked.connect(parent.update_entries_per_page)
-    page_layout.addWidget(parent.entries_per_page_button)
-    parent.prev_button = QPushButton("上一页", parent)
-    parent.prev_button.clicked.connect(parent.prev_page)
-    page_layout.addWidget(parent.prev_button)
-    parent.next_button = QPushButton("下一页", parent)
-    parent.next_button.clicked.connect(parent.next_page)
-    page_layout.addWidget(parent.next_button)
-    layout.addLayout(page_layout)
+    parent.count_label = QLabel("共 0 人", parent)
+    layout.addWidget(parent.count_label)
 
     delete_modify_layout = QHBoxLayout()
     parent.delete_button = QPushButton("删除", parent)
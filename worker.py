@@ -0,0 +1,33 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class Worker(QThread):
+    """
+    在后台线程运行 task(progress=..., cancelled=...)，结果通过信号交回界面线程。
+    task 用 progress(已完成, 总数) 报告进度，并定期检查 cancelled()，取消后可以抛出异常或直接返回；
+    取消之后的结果和异常都不再发出信号。读取名单、导入、导出和建立搜索索引都用它。
+    """
+    progress = pyqtSignal(int, int)  # 已完成, 总数（0 表示未知）
+    succeeded = pyqtSignal(object)  # task 的返回值
+    failed = pyqtSignal(str)
+
+    def __init__(self, task, parent=None):
+        super().__init__(parent)
+        self.task = task
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def cancelled(self):
+        return self.is_cancelled
+
+    def run(self):
+        try:
+            result = self.task(progress=self.progress.emit, cancelled=self.cancelled)
+        except Exception as e:
+            if not self.is_cancelled:  # 取消时抛出的 ImportCancelled、ExportCancelled 不算失败
+                self.failed.emit(str(e))
+            return
+        if not self.is_cancelled:
+            self.succeeded.emit(result)